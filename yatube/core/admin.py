@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_at', 'finished', 'duration_ms')
+    list_filter = ('status', 'name')
+    readonly_fields = ('payload', 'created', 'started', 'finished',
+                       'duration_ms', 'worker', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks
+        checks.report()
+        # Регистрирует задачи очереди из tasks.py приложений.
+        autodiscover_modules('tasks')
@@ -0,0 +1,196 @@
+"""ASGI-вход поверх WSGI-обработчика Django.
+
+Django 2.2 не умеет ни ASGI, ни асинхронные представления, поэтому
+представления остаются синхронными, а асинхронна работа с соединениями:
+цикл событий принимает запросы, читает тело и отдаёт ответ медленному
+клиенту, не занимая потоков. Сам обработчик Django (middleware,
+представление, запросы к базе, шаблон) выполняется в пуле из
+ASGI_THREADS потоков — не больше, чем база выдерживает соединений.
+При всплеске запросы ждут своей очереди к пулу, а не плодят потоки,
+которые делят GIL и блокировки SQLite.
+
+Если у потокового ответа есть async_streaming_content (SSE из
+posts.live), тело отдаётся из цикла событий: открытое соединение —
+корутина, которая ждёт событий без потока. Прочие потоковые ответы
+читаются по куску в небольшом пуле ASGI_STREAM_THREADS, чтобы не
+отнимать потоки у страниц. Тело запроса читается целиком до вызова
+представления.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+
+def build_environ(scope, body=b''):
+    """WSGI environ по ASGI scope HTTP-запроса."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт путь байтами UTF-8, прочитанными как latin-1.
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(
+            scope.get('http_version', '1.1')),
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            environ[name] = value
+            continue
+        name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    """ASGI-приложение, которое выполняет WSGI-приложение в пуле
+    потоков."""
+
+    def __init__(self, application, threads, stream_threads):
+        self.application = application
+        self.pages = ThreadPoolExecutor(
+            threads, thread_name_prefix='asgi')
+        self.streams = ThreadPoolExecutor(
+            stream_threads, thread_name_prefix='asgi-stream')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Тип соединения {scope["type"]} не '
+                             'поддерживается.')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        status, headers, content, stream = await loop.run_in_executor(
+            self.pages, self.run, build_environ(scope, body))
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': headers})
+        if stream is None:
+            await send({'type': 'http.response.body', 'body': content})
+        elif hasattr(stream, '__aiter__'):
+            await self.send_events(stream, receive, send)
+        else:
+            await self.send_stream(stream, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.pages.shutdown(wait=False)
+                self.streams.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент ушёл раньше."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    def run(self, environ):
+        """Выполняет запрос в потоке пула. Обычный ответ собирается и
+        закрывается здесь же: request_finished освобождает соединение
+        с базой того потока, который его открыл."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        result = self.application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            events = getattr(result, 'async_streaming_content', None)
+            if events is None:
+                return response['status'], response['headers'], None, result
+            # Запрос для Django окончен: представление отработало,
+            # дальше тело отдаёт цикл событий.
+            result.close()
+            return response['status'], response['headers'], None, events
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content, None
+
+    async def send_stream(self, stream, receive, send):
+        """Отдаёт потоковый ответ, пока он не кончится или клиент не
+        уйдёт."""
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.ensure_future(self.disconnect(receive))
+        chunks = iter(stream)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    self.streams, next, chunks, None)
+                if chunk is None or disconnected.done():
+                    break
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await loop.run_in_executor(self.streams, stream.close)
+
+    async def send_events(self, events, receive, send):
+        """Отдаёт асинхронное тело, пока оно не кончится или клиент не
+        уйдёт; ожидание следующего куска не занимает потоков."""
+        disconnected = asyncio.ensure_future(self.disconnect(receive))
+        chunks = events.__aiter__()
+        chunk = None
+        try:
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait({chunk, disconnected},
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    break
+                try:
+                    body = chunk.result()
+                except StopAsyncIteration:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                if isinstance(body, str):
+                    body = body.encode()
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+        finally:
+            disconnected.cancel()
+            if chunk is not None and not chunk.done():
+                # Отмена закрывает генератор и снимает его с ожидания.
+                chunk.cancel()
+                await asyncio.wait({chunk})
+
+    async def disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
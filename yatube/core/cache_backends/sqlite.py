@@ -0,0 +1,212 @@
+"""Кэш в отдельном файле SQLite в режиме WAL.
+
+В отличие от LocMemCache один файл видят все процессы gunicorn, поэтому
+инвалидация в одном воркере сразу действует в остальных, а память не
+умножается на число воркеров. Внешние сервисы не нужны.
+
+Размер ограничен параметром OPTIONS['MAX_ENTRIES']; при переполнении
+удаляются просроченные записи, а затем давно не читавшиеся (LRU).
+Время доступа обновляется не чаще раза в OPTIONS['LRU_RESOLUTION']
+секунд, чтобы чтение почти никогда не превращалось в запись.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = os.path.abspath(location)
+        self._lru_resolution = float(options.get('LRU_RESOLUTION', 60))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            connection = sqlite3.connect(self._path,
+                                         timeout=self._busy_timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _dumps(self, value):
+        return zlib.compress(pickle.dumps(value, self.pickle_protocol))
+
+    def _loads(self, blob):
+        return pickle.loads(zlib.decompress(blob))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self):
+        """Транзакция записи: BEGIN IMMEDIATE сразу берёт блокировку,
+        поэтому read-modify-write (incr, add) атомарны между процессами."""
+        return _Transaction(self._db)
+
+    def _cull(self, db, now):
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        (count,), = db.execute('SELECT COUNT(*) FROM cache')
+        if count < self._max_entries:
+            return
+        excess = count - self._max_entries + 1
+        if self._cull_frequency:
+            excess = max(excess, count // self._cull_frequency)
+        else:
+            excess = count
+        db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (excess,))
+
+    def _set(self, db, key, value, timeout, now):
+        db.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed)'
+            ' VALUES (?, ?, ?, ?)',
+            (key, self._dumps(value), self.get_backend_timeout(timeout), now))
+
+    def _touch_accessed(self, keys, now):
+        try:
+            self._db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ? AND accessed < ?',
+                [(now, key, now - self._lru_resolution) for key in keys])
+        except sqlite3.OperationalError:
+            # Время доступа — лишь подсказка для вытеснения.
+            pass
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        db_keys = {self._key(key, version): key for key in keys}
+        now = time.time()
+        rows = self._db.execute(
+            'SELECT key, value, accessed FROM cache'
+            ' WHERE key IN ({}) AND (expires IS NULL OR expires > ?)'.format(
+                ', '.join('?' * len(db_keys))),
+            (*db_keys, now)).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - self._lru_resolution]
+        if stale:
+            self._touch_accessed(stale, now)
+        return {db_keys[key]: self._loads(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._write() as db:
+            self._cull(db, now)
+            for key, value in data.items():
+                self._set(db, self._key(key, version), value, timeout, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?',
+                       (key, now))
+            if db.execute('SELECT 1 FROM cache WHERE key = ?',
+                          (key,)).fetchone():
+                return False
+            self._cull(db, now)
+            self._set(db, key, value, timeout, now)
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        db_key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            row = db.execute(
+                'SELECT value FROM cache'
+                ' WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (db_key, now)).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = self._loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ?, accessed = ? WHERE key = ?',
+                (self._dumps(new_value), now, db_key))
+        return new_value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            cursor = db.execute(
+                'UPDATE cache SET expires = ?, accessed = ?'
+                ' WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now))
+            return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        db_keys = [self._key(key, version) for key in keys]
+        with self._write() as db:
+            cursor = db.executemany('DELETE FROM cache WHERE key = ?',
+                                    [(key,) for key in db_keys])
+            return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._db.execute(
+            'SELECT 1 FROM cache'
+            ' WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())).fetchone() is not None
+
+    def clear(self):
+        with self._write() as db:
+            db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение переиспользуется между запросами потока.
+        pass
+
+
+class _Transaction:
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
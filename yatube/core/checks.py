@@ -0,0 +1,63 @@
+"""Самопроверка настроек при запуске.
+
+report() пишет в лог yatube.settings, что включено в текущем процессе,
+а системная проверка предупреждает, если профиль production собран
+с отладочными настройками.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.checks import Warning, register
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger('yatube.settings')
+
+MANIFEST_STORAGE = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage')
+
+
+def templates_cached():
+    engine = engines['django'].engine
+    return any(isinstance(loader, CachedLoader)
+               for loader in engine.template_loaders)
+
+
+def active_settings():
+    return {
+        'profile': getattr(settings, 'YATUBE_ENV', None),
+        'debug': settings.DEBUG,
+        'debug_toolbar': 'debug_toolbar' in settings.INSTALLED_APPS,
+        'cached_templates': templates_cached(),
+        'conn_max_age': {alias: database.get('CONN_MAX_AGE', 0)
+                         for alias, database in settings.DATABASES.items()},
+        'replicas': settings.DATABASE_REPLICAS,
+        'staticfiles_storage': settings.STATICFILES_STORAGE,
+        'cache_backend': settings.CACHES['default']['BACKEND'],
+    }
+
+
+def report():
+    logger.info(json.dumps({'settings': active_settings()}))
+
+
+@register()
+def production_settings(app_configs, **kwargs):
+    if getattr(settings, 'YATUBE_ENV', None) != 'production':
+        return []
+    active = active_settings()
+    problems = {
+        'W001': (active['debug'], 'DEBUG включён.'),
+        'W002': (active['debug_toolbar'], 'Установлен debug_toolbar.'),
+        'W003': (not active['cached_templates'],
+                 'Шаблоны загружаются без кэширования.'),
+        'W004': (0 in active['conn_max_age'].values(),
+                 'CONN_MAX_AGE = 0: соединение с базой на каждый запрос.'),
+        'W005': (active['staticfiles_storage'] != MANIFEST_STORAGE,
+                 'Статика без хэшей в именах (ManifestStaticFilesStorage).'),
+    }
+    return [
+        Warning(message, hint='Профиль production.', id=f'yatube.{code}')
+        for code, (failed, message) in problems.items() if failed
+    ]
@@ -0,0 +1,63 @@
+"""SQLite с настройками для нескольких воркеров.
+
+На каждом новом соединении включаются WAL (читатели не ждут писателя),
+synchronous=NORMAL, кэш страниц и mmap; значения задаёт
+OPTIONS['pragmas']. Пишущие транзакции начинаются с BEGIN IMMEDIATE:
+писатели встают в очередь на блокировку (OPTIONS['timeout']) сразу,
+а не получают «database is locked» при попытке повысить блокировку
+чтения до записи.
+
+С OPTIONS['read_only'] = True файл открывается в режиме mode=ro —
+так устроен псевдоним readonly, на который core.db_routers отправляет
+чтение.
+"""
+from urllib.parse import quote
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Отрицательное значение — в килобайтах: 64 МБ на соединение.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        self.read_only = options.get('read_only', False)
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('read_only', None)
+        database = kwargs['database']
+        if self.read_only and not database.startswith('file:'):
+            kwargs['database'] = f'file:{quote(database)}?mode=ro'
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = dict(self.pragmas)
+        if self.read_only:
+            # Режим журнала меняет только писатель.
+            pragmas.pop('journal_mode', None)
+            pragmas['query_only'] = 1
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        # Так Django открывает внешний atomic() на SQLite; обычный BEGIN
+        # отложил бы блокировку записи до первого INSERT/UPDATE.
+        self.cursor().execute('BEGIN IMMEDIATE')
+
+    def _set_autocommit(self, autocommit):
+        # isolation_level задаёт, каким BEGIN модуль sqlite3 открывает
+        # транзакцию перед первой записью при set_autocommit(False).
+        with self.wrap_database_errors:
+            self.connection.isolation_level = (
+                None if autocommit else 'IMMEDIATE')
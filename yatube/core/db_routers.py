@@ -0,0 +1,47 @@
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_ONLY_ALIAS = 'readonly'
+
+_state = threading.local()
+
+
+def set_read_replica(alias):
+    """Направляет чтение текущего потока на реплику alias; None — обратно
+    на основную базу. Вызывает core.middleware.ReplicaRoutingMiddleware."""
+    _state.replica = alias
+
+
+def read_replica():
+    return getattr(_state, 'replica', None)
+
+
+class ReadWriteRouter:
+    """Чтение — с реплики, выбранной для текущего запроса, иначе через
+    соединения только для чтения (псевдоним readonly, если он настроен);
+    запись — через default.
+
+    Внутри транзакции на default чтение остаётся на ней же, чтобы
+    запрос видел собственные незакоммиченные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replica = read_replica()
+        if replica is not None:
+            return replica
+        if READ_ONLY_ALIAS in settings.DATABASES:
+            return READ_ONLY_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections, reset_queries
+
+from core import tasks
+
+# Как часто воркер возвращает брошенные задачи и чистит выполненные.
+MAINTENANCE_INTERVAL = 60
+
+
+class Worker:
+    """Цикл одного процесса: забирает задачи порциями и выполняет."""
+
+    def __init__(self, batch, once):
+        self.batch = batch
+        self.once = once
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        self.processed = 0
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self):
+        last_maintenance = 0
+        while not self.stopping:
+            close_old_connections()
+            reset_queries()
+            if time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                tasks.requeue_stale()
+                tasks.purge()
+                last_maintenance = time.monotonic()
+            jobs = tasks.claim(self.name, self.batch)
+            for position, job in enumerate(jobs):
+                if self.stopping:
+                    tasks.release(self.name, [job.id for job in
+                                              jobs[position:]])
+                    break
+                if tasks.run(job) is not None:
+                    self.processed += 1
+            if not jobs:
+                if self.once:
+                    break
+                time.sleep(settings.TASK_POLL_INTERVAL)
+        return self.processed
+
+
+def worker_process(batch, once):
+    worker = Worker(batch, once)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Запускает воркеры фоновой очереди (core.tasks): пул '
+            'процессов, каждый забирает готовые задачи по приоритету. '
+            'Умерший процесс перезапускается; SIGTERM завершает текущие '
+            'задачи и останавливает пул.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Число процессов; 0 — работать в этом '
+                                 'процессе.')
+        parser.add_argument('--batch', type=int, default=10,
+                            help='Сколько задач забирать за раз.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда готовых задач не останется.')
+        parser.add_argument('--stats', action='store_true',
+                            help='Вывести сводку по задачам и выйти.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(tasks.stats(), indent=2,
+                                         ensure_ascii=False))
+            return
+        if not options['processes']:
+            worker = Worker(options['batch'], options['once'])
+            processed = worker.run()
+            self.stdout.write(f'Выполнено задач: {processed}')
+            return
+        self.supervise(options)
+
+    def supervise(self, options):
+        context = multiprocessing.get_context('fork')
+        # Дочерние процессы открывают свои соединения с базой.
+        connections.close_all()
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            for process in processes:
+                if process.is_alive():
+                    os.kill(process.pid, signal.SIGTERM)
+
+        def start():
+            process = context.Process(
+                target=worker_process,
+                args=(options['batch'], options['once']))
+            process.start()
+            return process
+
+        processes = [start() for _ in range(options['processes'])]
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f'Воркеров: {len(processes)}')
+        while processes:
+            time.sleep(0.5)
+            for process in list(processes):
+                if process.is_alive():
+                    continue
+                processes.remove(process)
+                if process.exitcode and not stopping:
+                    self.stderr.write(f'Воркер {process.pid} завершился '
+                                      f'с кодом {process.exitcode}, '
+                                      f'перезапускаю')
+                    processes.append(start())
@@ -0,0 +1,68 @@
+"""Сводка времени ответа и SQL-запросов по представлениям.
+
+Хранит последние REQUEST_METRICS_SAMPLES замеров каждого представления
+в памяти процесса; у каждого воркера gunicorn своя сводка.
+"""
+import math
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+FIELDS = ('latency_ms', 'queries', 'sql_ms', 'template_ms')
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def query_budget(view_name):
+    return settings.REQUEST_QUERY_BUDGETS.get(
+        view_name, settings.REQUEST_QUERY_BUDGET)
+
+
+class RequestStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples = defaultdict(
+                lambda: deque(maxlen=settings.REQUEST_METRICS_SAMPLES))
+            self._totals = defaultdict(lambda: [0, 0])
+
+    def record(self, view_name, sample, over_budget):
+        with self._lock:
+            self._samples[view_name].append(
+                tuple(sample[field] for field in FIELDS))
+            totals = self._totals[view_name]
+            totals[0] += 1
+            totals[1] += over_budget
+
+    def summary(self):
+        with self._lock:
+            samples = {name: list(rows)
+                       for name, rows in self._samples.items()}
+            totals = {name: list(row) for name, row in self._totals.items()}
+        summary = {}
+        for name, rows in samples.items():
+            view = {'requests': totals[name][0],
+                    'over_budget': totals[name][1],
+                    'query_budget': query_budget(name)}
+            for position, field in enumerate(FIELDS):
+                values = [row[position] for row in rows]
+                view[field] = {
+                    f'p{percent}': round(percentile(values, percent), 3)
+                    for percent in (50, 95, 99)
+                }
+                view[field]['max'] = round(max(values), 3)
+            summary[name] = view
+        return summary
+
+
+stats = RequestStats()
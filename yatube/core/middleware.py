@@ -0,0 +1,187 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template.backends.django import Template
+
+from .db_routers import set_read_replica
+from .metrics import query_budget, stats
+
+logger = logging.getLogger('yatube.requests')
+
+_local = threading.local()
+
+
+class _Measurement:
+    """Счётчики одного запроса; заодно обёртка для execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.rendering = False
+        self.paused = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.paused:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - started
+
+
+@contextmanager
+def untracked():
+    """Запросы внутри блока не входят в метрики текущего запроса: так
+    выполняются задачи в режиме TASKS_EAGER, которые в рабочем режиме
+    идут в воркере и бюджет представления не расходуют."""
+    measurement = getattr(_local, 'measurement', None)
+    if measurement is None:
+        yield
+        return
+    measurement.paused += 1
+    try:
+        yield
+    finally:
+        measurement.paused -= 1
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context=None, request=None):
+        measurement = getattr(_local, 'measurement', None)
+        if measurement is None or measurement.rendering:
+            return render(self, context, request)
+        measurement.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            measurement.rendering = False
+            measurement.template += time.perf_counter() - started
+    return wrapper
+
+
+def _instrument_templates():
+    # Вложенные {% include %} рендерятся внутри, поэтому считается только
+    # внешний вызов бэкенда; ленивые запросы из шаблона входят и в SQL.
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
+        Template.render.timed = True
+
+
+class RequestMetricsMiddleware:
+    """Число и время SQL-запросов, время шаблонов и полное время ответа
+    каждого запроса.
+
+    Пишет строку JSON в логгер yatube.requests (INFO, а при превышении
+    REQUEST_QUERY_BUDGET — WARNING) и копит сводку по представлениям
+    для /metrics/requests/. Работает и с DEBUG = False: запросы считает
+    connection.execute_wrapper, а не connection.queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _instrument_templates()
+
+    def __call__(self, request):
+        measurement = _Measurement()
+        _local.measurement = measurement
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(measurement))
+                response = self.get_response(request)
+        finally:
+            _local.measurement = None
+        latency = time.perf_counter() - started
+
+        match = request.resolver_match
+        if match is None:
+            return response
+        sample = {
+            'latency_ms': round(latency * 1000, 3),
+            'queries': measurement.queries,
+            'sql_ms': round(measurement.sql * 1000, 3),
+            'template_ms': round(measurement.template * 1000, 3),
+        }
+        budget = query_budget(match.view_name)
+        over_budget = measurement.queries > budget
+        stats.record(match.view_name, sample, over_budget)
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps({
+                'view': match.view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **sample,
+                'query_budget': budget,
+                'over_budget': over_budget,
+            }, ensure_ascii=False))
+        return response
+
+
+class _WriteDetector:
+    """Обёртка execute_wrapper: замечает INSERT, UPDATE и DELETE."""
+
+    WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self):
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.wrote and sql.lstrip()[:6].upper() in self.WRITES:
+            self.wrote = True
+        return execute(sql, params, many, context)
+
+
+class ReplicaRoutingMiddleware:
+    """Безопасные запросы к представлениям из REPLICA_VIEWS читают
+    со случайной реплики из DATABASE_REPLICAS, остальные — с основной
+    базы.
+
+    Ответ на запрос, который писал в основную базу (в том числе GET
+    вроде profile_follow или сохранение сессии при входе), ставит cookie
+    REPLICA_PIN_COOKIE на REPLICA_PIN_SECONDS: пока она жива, браузер
+    читает с основной базы и видит свои изменения, даже если реплика
+    отстала. Без реплик ничего не делает.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        writes = _WriteDetector()
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(writes):
+                response = self.get_response(request)
+        finally:
+            set_read_replica(None)
+        if writes.wrote:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS
+                and request.method in self.SAFE_METHODS
+                and request.resolver_match.view_name in settings.REPLICA_VIEWS
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES):
+            set_read_replica(random.choice(settings.DATABASE_REPLICAS))
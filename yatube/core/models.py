@@ -0,0 +1,59 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """Задача фоновой очереди (core.tasks)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(verbose_name='Аргументы',
+                               help_text='JSON: {"args": [...], '
+                                         '"kwargs": {...}}')
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+        help_text='Больше — раньше'
+    )
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED, verbose_name='Состояние')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(verbose_name='Не раньше')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Поставлена')
+    started = models.DateTimeField(null=True, blank=True,
+                                   verbose_name='Начата')
+    finished = models.DateTimeField(null=True, blank=True,
+                                    verbose_name='Завершена')
+    duration_ms = models.FloatField(null=True, blank=True,
+                                    verbose_name='Длительность, мс')
+    worker = models.CharField(max_length=100, blank=True,
+                              verbose_name='Воркер')
+    last_error = models.TextField(blank=True,
+                                  verbose_name='Последняя ошибка')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'],
+                         name='job_ready_idx'),
+            models.Index(fields=['name', 'status', 'finished'],
+                         name='job_name_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,240 @@
+"""Фоновая очередь задач в базе, без внешнего брокера.
+
+Задача — функция, помеченная @task в модуле tasks.py любого приложения.
+Вызов fn.enqueue(*args) записывает строку Job в текущей транзакции:
+задача появится у воркеров вместе с данными, ради которых поставлена,
+и пропадёт вместе с ними при откате. Аргументы должны сериализоваться
+в JSON, поэтому передаются id, а не объекты.
+
+Воркеры (manage.py run_workers) забирают готовые задачи по приоритету
+и времени, при ошибке ставят их обратно с экспоненциальной задержкой,
+после max_attempts помечают failed. Задачи, чей воркер умер, через
+TASK_LOCK_TIMEOUT возвращаются в очередь (попытка при этом засчитана),
+поэтому функции задач должны переживать повторный запуск.
+
+С TASKS_EAGER = True enqueue() выполняет задачу сразу — для разработки
+без запущенных воркеров и для тестов; ошибка задачи и тогда только
+логируется.
+"""
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .metrics import percentile
+from .middleware import untracked
+from .models import Job
+
+logger = logging.getLogger('yatube.tasks')
+
+registry = {}
+
+
+class Task:
+
+    def __init__(self, function, name, priority, max_attempts):
+        self.function = function
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def enqueue(self, *args, priority=None, delay=0, **kwargs):
+        """Ставит задачу в очередь; возвращает Job или None в режиме
+        TASKS_EAGER."""
+        payload = json.dumps({'args': args, 'kwargs': kwargs})
+        if settings.TASKS_EAGER:
+            self.run_eager(args, kwargs)
+            return None
+        return Job.objects.create(
+            name=self.name,
+            payload=payload,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def run_eager(self, args, kwargs):
+        """Выполняет задачу сразу. Как и в воркере, сбой задачи только
+        логируется и не откатывает запись, ради которой она поставлена:
+        её изменения откатываются до своей точки сохранения."""
+        try:
+            with untracked(), transaction.atomic():
+                self.function(*args, **kwargs)
+        except Exception:
+            logger.exception(json.dumps({
+                'task': self.name,
+                'status': Job.FAILED,
+                'eager': True,
+            }, ensure_ascii=False))
+
+
+def task(function=None, *, name=None, priority=0, max_attempts=None):
+    """Регистрирует функцию как задачу «приложение.функция»."""
+    def register(function):
+        task_name = name or '{}.{}'.format(
+            function.__module__.split('.')[0], function.__name__)
+        registry[task_name] = Task(
+            function, task_name, priority,
+            max_attempts or settings.TASK_MAX_ATTEMPTS)
+        return registry[task_name]
+    return register(function) if function else register
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой, секунды: удвоение от
+    TASK_RETRY_DELAY до TASK_RETRY_MAX_DELAY и до 10 % случайного
+    разброса, чтобы упавшие вместе задачи не повторялись разом."""
+    delay = min(settings.TASK_RETRY_DELAY * 2 ** (attempts - 1),
+                settings.TASK_RETRY_MAX_DELAY)
+    return delay * (1 + random.random() / 10)
+
+
+def claim(worker, limit=1):
+    """Забирает до limit готовых задач и помечает их running."""
+    now = timezone.now()
+    with transaction.atomic():
+        # На PostgreSQL воркеры не ждут чужие блокировки строк; SQLite
+        # и так пропускает писателей по одному (BEGIN IMMEDIATE).
+        ids = list(Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_at__lte=now,
+        ).order_by('-priority', 'run_at', 'id').values_list(
+            'id', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, started=now, worker=worker)
+        return list(Job.objects.filter(
+            id__in=ids, worker=worker, status=Job.RUNNING,
+        ).order_by('-priority', 'run_at', 'id'))
+
+
+def start(job):
+    """Отмечает начало попытки. False, если задачу, пока она ждала
+    в порции воркера, вернул в очередь requeue_stale."""
+    now = timezone.now()
+    # Попытка считается при запуске: если задача уронит воркер,
+    # requeue_stale увидит её в attempts.
+    if not Job.objects.filter(
+            id=job.id, worker=job.worker, status=Job.RUNNING).update(
+            started=now, attempts=F('attempts') + 1):
+        return False
+    job.started = now
+    job.attempts += 1
+    return True
+
+
+def run(job):
+    """Выполняет забранную задачу и записывает результат. Возвращает
+    None, если задача уже не принадлежит этому воркеру."""
+    if not start(job):
+        logger.info(json.dumps({'task': job.name, 'job': job.id,
+                                'status': 'skipped'}))
+        return None
+    started = time.perf_counter()
+    error = ''
+    try:
+        task = registry.get(job.name)
+        if task is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        payload = json.loads(job.payload)
+        task.function(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+    duration_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    fields = {'attempts': job.attempts, 'duration_ms': duration_ms,
+              'last_error': error}
+    if not error:
+        fields.update(status=Job.DONE, finished=timezone.now())
+    elif job.attempts < job.max_attempts:
+        fields.update(status=Job.QUEUED, run_at=timezone.now() + timedelta(
+            seconds=retry_delay(job.attempts)))
+    else:
+        fields.update(status=Job.FAILED, finished=timezone.now())
+    Job.objects.filter(id=job.id).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+    wait_ms = (job.started - job.run_at).total_seconds() * 1000
+    logger.log(
+        logging.ERROR if fields['status'] == Job.FAILED
+        else logging.WARNING if error else logging.INFO,
+        json.dumps({
+            'task': job.name,
+            'job': job.id,
+            'status': fields['status'],
+            'attempt': job.attempts,
+            'duration_ms': duration_ms,
+            'wait_ms': round(max(wait_ms, 0), 3),
+            'error': error.strip().splitlines()[-1] if error else None,
+        }, ensure_ascii=False))
+    return job
+
+
+def release(worker, ids):
+    """Возвращает в очередь забранные, но не начатые задачи."""
+    Job.objects.filter(id__in=ids, worker=worker,
+                       status=Job.RUNNING).update(status=Job.QUEUED,
+                                                  worker='')
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, чей воркер не отчитался за
+    TASK_LOCK_TIMEOUT секунд; задачи, исчерпавшие max_attempts,
+    помечает failed — скорее всего, воркер уронили они сами.
+    Возвращает число возвращённых в очередь."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        started__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, worker='', finished=now,
+        last_error='Воркер не завершил задачу за TASK_LOCK_TIMEOUT.')
+    return stale.update(status=Job.QUEUED, worker='', run_at=now)
+
+
+def purge():
+    """Удаляет выполненные задачи старше TASK_KEEP_DONE секунд."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_KEEP_DONE)
+    deleted, _ = Job.objects.filter(status=Job.DONE,
+                                    finished__lt=deadline).delete()
+    return deleted
+
+
+def stats(samples=1000):
+    """Сводка по задачам: сколько в каждом состоянии, сколько
+    повторялось и перцентили длительности последних выполненных."""
+    summary = {}
+    for row in Job.objects.values('name', 'status').annotate(
+            count=Count('id')).order_by():
+        view = summary.setdefault(row['name'], {
+            'queued': 0, 'running': 0, 'done': 0, 'failed': 0})
+        view[row['status']] = row['count']
+    for name, view in summary.items():
+        view['retried'] = Job.objects.filter(
+            name=name, attempts__gt=1).count()
+        durations = list(Job.objects.filter(
+            name=name, status=Job.DONE,
+        ).order_by('-finished').values_list('duration_ms', flat=True)[
+            :samples])
+        if durations:
+            view['duration_ms'] = {
+                f'p{percent}': round(percentile(durations, percent), 3)
+                for percent in (50, 95, 99)
+            }
+            view['duration_ms']['mean'] = round(
+                sum(durations) / len(durations), 3)
+    return summary
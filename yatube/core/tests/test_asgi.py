@@ -0,0 +1,153 @@
+import asyncio
+from concurrent.futures import Executor, Future
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts import live
+from posts.models import Post
+
+from ..asgi import ASGIHandler, build_environ
+
+User = get_user_model()
+
+
+class InlineExecutor(Executor):
+    """Выполняет задачи в текущем потоке: тестовая транзакция и
+    соединение с базой у обработчика те же, что у теста."""
+
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+def scope(path, query_string=b'', headers=()):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query_string, 'headers': list(headers),
+            'client': ('192.0.2.1', 1234), 'server': ('testserver', 80)}
+
+
+class BuildEnvironTests(SimpleTestCase):
+
+    def test_environ(self):
+        headers = [(b'cookie', b'a=1'),
+                   (b'cookie', b'b=2'),
+                   (b'content-type', b'text/plain'),
+                   (b'accept', b'text/html')]
+        environ = build_environ(scope('/группа/', b'q=%D0%BF', headers),
+                                b'body')
+        self.assertEqual(environ['PATH_INFO'],
+                         '/группа/'.encode().decode('latin-1'))
+        self.assertEqual(environ['QUERY_STRING'], 'q=%D0%BF')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html')
+        self.assertEqual(environ['REMOTE_ADDR'], '192.0.2.1')
+        self.assertEqual(environ['wsgi.input'].read(), b'body')
+
+
+class ASGIHandlerTests(TestCase):
+
+    def setUp(self):
+        self.application = ASGIHandler(WSGIHandler(), 1, 1)
+        self.application.pages = InlineExecutor()
+        self.application.streams = InlineExecutor()
+        self.messages = []
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        if not self.messages:
+            self.messages.append(None)
+            return {'type': 'http.request', 'body': b''}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    def call(self, scope):
+        async def run():
+            await asyncio.wait_for(
+                self.application(scope, self.receive, self.send), 5)
+        asyncio.run(run())
+        return self.messages[1:]
+
+    def test_page(self):
+        author = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(author=author, text='Тестовый пост')
+        start, body = self.call(scope(reverse('posts:index')))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn('Тестовый пост', body['body'].decode())
+        self.assertNotIn('more_body', body)
+
+    def test_not_found(self):
+        start, body = self.call(scope('/нет-такой-страницы/'))
+        self.assertEqual(start['status'], 404)
+
+    @override_settings(LIVE_POLL_INTERVAL=0, LIVE_HEARTBEAT=0.01)
+    def test_stream_until_disconnect(self):
+        """Поток SSE идёт по кускам и заканчивается с уходом клиента."""
+        send = self.send
+
+        async def send_and_leave(message):
+            await send(message)
+            if message.get('more_body'):
+                self.disconnected.set()
+
+        self.send = send_and_leave
+        with mock.patch.object(live, 'broker', live.Broker()):
+            start, first, *_ = self.call(scope(reverse(
+                'posts:index_events')))
+        self.assertIn((b'content-type', b'text/event-stream'),
+                      start['headers'])
+        self.assertEqual(first['body'], b'retry: 3000\n\n')
+        self.assertTrue(first['more_body'])
+
+    @override_settings(LIVE_POLL_INTERVAL=0, LIVE_HEARTBEAT=5)
+    def test_stream_woken_from_poller_thread(self):
+        """Событие из потока опроса будит поток SSE в цикле событий;
+        пул потоковых ответов не используется."""
+        broker = live.Broker()
+        broker.last_id = 0
+        send = self.send
+
+        async def send_and_publish(message):
+            await send(message)
+            if message.get('body', b'').startswith(b'retry'):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, broker.publish, [live.Event(7, 1)])
+            elif message.get('more_body'):
+                self.disconnected.set()
+
+        self.send = send_and_publish
+        self.application.streams = mock.Mock(spec=Executor)
+        with mock.patch.object(live, 'broker', broker):
+            start, first, event = self.call(scope(reverse(
+                'posts:index_events')))
+        self.assertIn(b'id: 7\n', event['body'])
+        self.assertFalse(broker.waiters)
+        self.application.streams.submit.assert_not_called()
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])
@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase, override_settings
+
+from .. import checks
+
+
+class SettingsCheckTests(SimpleTestCase):
+
+    def test_active_settings(self):
+        active = checks.active_settings()
+        self.assertEqual(active['profile'], 'development')
+        self.assertTrue(active['debug_toolbar'])
+        self.assertIn('default', active['conn_max_age'])
+
+    def test_development_is_not_checked(self):
+        self.assertEqual(checks.production_settings(None), [])
+
+    @override_settings(YATUBE_ENV='production', DEBUG=True)
+    def test_production_warnings(self):
+        """Отладочные настройки в профиле production — предупреждения."""
+        codes = {warning.id for warning in checks.production_settings(None)}
+        self.assertTrue({'yatube.W001', 'yatube.W002', 'yatube.W004',
+                         'yatube.W005'} <= codes)
+
+    def test_report(self):
+        with self.assertLogs('yatube.settings', 'INFO') as logs:
+            checks.report()
+        self.assertIn('"profile": "development"', logs.output[0])
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import ignore_warnings
+
+from ..db_backends.sqlite3.base import DatabaseWrapper
+from ..db_routers import READ_ONLY_ALIAS, ReadWriteRouter
+
+
+class SQLiteBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        self.writer = self.make_wrapper()
+        self.writer.ensure_connection()
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_wrapper(self, **options):
+        return DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': self.path,
+             'OPTIONS': {'timeout': 1, **options}}, 'test')
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """На новом соединении включены WAL и synchronous=NORMAL."""
+        self.assertEqual(self.pragma(self.writer, 'journal_mode'), 'wal')
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma(self.writer, 'synchronous'), 1)
+        self.assertEqual(self.pragma(self.writer, 'cache_size'), -64000)
+
+    def test_pragmas_override(self):
+        wrapper = self.make_wrapper(pragmas={'cache_size': -2000})
+        try:
+            self.assertEqual(self.pragma(wrapper, 'cache_size'), -2000)
+        finally:
+            wrapper.close()
+
+    def test_read_only(self):
+        """Соединение только для чтения видит данные и не пишет."""
+        with self.writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+            cursor.execute('INSERT INTO item VALUES (1)')
+        reader = self.make_wrapper(read_only=True)
+        try:
+            with reader.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM item')
+                self.assertEqual(cursor.fetchone()[0], 1)
+                with self.assertRaises(DatabaseError):
+                    cursor.execute('INSERT INTO item VALUES (2)')
+        finally:
+            reader.close()
+
+    def test_immediate_transaction(self):
+        """atomic() и set_autocommit(False) начинают транзакцию
+        с BEGIN IMMEDIATE."""
+        statements = []
+        self.writer.ensure_connection()
+        self.writer.connection.set_trace_callback(statements.append)
+        # Так внешний atomic() открывает транзакцию на SQLite.
+        self.writer.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True)
+        self.writer.rollback()
+        self.assertEqual(statements[0], 'BEGIN IMMEDIATE')
+        self.writer.set_autocommit(False)
+        try:
+            self.assertEqual(self.writer.connection.isolation_level,
+                             'IMMEDIATE')
+        finally:
+            self.writer.set_autocommit(True)
+        self.assertIsNone(self.writer.connection.isolation_level)
+
+
+def databases(*aliases):
+    """Подменяет settings.DATABASES для роутера: соединения не меняются."""
+    return override_settings(DATABASES={
+        alias: connection.settings_dict for alias in aliases})
+
+
+@ignore_warnings(message='Overriding setting DATABASES')
+class ReadWriteRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReadWriteRouter()
+
+    def test_routing(self):
+        """Чтение уходит на readonly, запись и миграции — на default."""
+        with databases('default', READ_ONLY_ALIAS):
+            self.assertEqual(self.router.db_for_read(None), READ_ONLY_ALIAS)
+        self.assertEqual(self.router.db_for_write(None), 'default')
+        self.assertFalse(self.router.allow_migrate(READ_ONLY_ALIAS, 'posts'))
+
+    def test_without_read_only_alias(self):
+        with databases('default'):
+            self.assertIsNone(self.router.db_for_read(None))
+
+
+@ignore_warnings(message='Overriding setting DATABASES')
+class ReadWriteRouterTransactionTests(TestCase):
+
+    def test_read_in_transaction(self):
+        """В открытой транзакции чтение остаётся на default."""
+        with databases('default', READ_ONLY_ALIAS):
+            self.assertEqual(ReadWriteRouter().db_for_read(None), 'default')
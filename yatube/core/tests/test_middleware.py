@@ -0,0 +1,166 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import ignore_warnings
+from django.urls import resolve, reverse
+
+from posts.models import Group, Post
+
+from ..db_routers import READ_ONLY_ALIAS, ReadWriteRouter, read_replica
+from ..metrics import percentile, stats
+from ..middleware import ReplicaRoutingMiddleware
+
+User = get_user_model()
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.admin = User.objects.create_user(username='TestAdmin',
+                                             is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        stats.reset()
+        self.guest_client = Client()
+
+    def log_line(self, url, level='INFO'):
+        with self.assertLogs('yatube.requests', level) as logs:
+            self.guest_client.get(url)
+        return json.loads(logs.records[-1].getMessage())
+
+    def test_log_line(self):
+        """Строка лога содержит число запросов и время SQL и шаблонов."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        line = self.log_line(url)
+        self.assertEqual(line['view'], 'posts:group_list')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['queries'], 0)
+        self.assertGreater(line['template_ms'], 0)
+        self.assertGreaterEqual(line['latency_ms'], line['sql_ms'])
+        self.assertFalse(line['over_budget'])
+
+    @override_settings(REQUEST_QUERY_BUDGETS={'posts:group_list': 0})
+    def test_over_budget_warning(self):
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        line = self.log_line(url, level='WARNING')
+        self.assertTrue(line['over_budget'])
+        self.assertEqual(line['query_budget'], 0)
+
+    def test_summary_endpoint(self):
+        """Сводка с перцентилями доступна только персоналу."""
+        for _ in range(3):
+            self.guest_client.get(reverse('posts:index'))
+        url = reverse('request_metrics')
+        self.assertEqual(self.guest_client.get(url).status_code, 302)
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        summary = admin_client.get(url).json()
+        index = summary['posts:index']
+        self.assertEqual(index['requests'], 3)
+        self.assertEqual(set(index['latency_ms']),
+                         {'p50', 'p95', 'p99', 'max'})
+
+    def test_eager_tasks_not_counted(self):
+        """Задачи, выполненные сразу (TASKS_EAGER), не расходуют
+        бюджет представления: в рабочем режиме их выполняет воркер."""
+        client = Client()
+        client.force_login(self.author)
+        queries = {}
+        for eager in (False, True):
+            with override_settings(TASKS_EAGER=eager), \
+                    self.assertLogs('yatube.requests', 'INFO') as logs:
+                client.post(reverse('posts:post_create'),
+                            {'text': 'Новый пост', 'group': self.group.id})
+            queries[eager] = json.loads(
+                logs.records[-1].getMessage())['queries']
+        # Без очереди нет вставок в таблицу задач.
+        self.assertLess(queries[True], queries[False])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReadWriteRouter()
+
+    def read_alias(self, request):
+        """Псевдоним, который роутер выбирает внутри представления."""
+        aliases = []
+
+        def view(request):
+            aliases.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        request.resolver_match = resolve(request.path)
+        middleware.process_view(request, view, (), {})
+        middleware(request)
+        self.assertIsNone(read_replica())
+        return aliases[0]
+
+    def test_read_views_use_replica(self):
+        request = self.factory.get(reverse('posts:index'))
+        self.assertIn(self.read_alias(request), ('replica1', 'replica2'))
+
+    def test_other_views_use_primary(self):
+        """Формы, POST и браузер после записи читают с основной базы."""
+        requests = [
+            self.factory.get(reverse('posts:post_create')),
+            self.factory.post(reverse('posts:index')),
+        ]
+        pinned = self.factory.get(reverse('posts:index'))
+        pinned.COOKIES['read_primary'] = '1'
+        for request in requests + [pinned]:
+            with self.subTest(path=request.path, method=request.method):
+                self.assertIsNone(self.read_alias(request))
+
+    @ignore_warnings(message='Overriding setting DATABASES')
+    @override_settings(DATABASE_REPLICAS=[],
+                       DATABASES={'default': {}, READ_ONLY_ALIAS: {}})
+    def test_without_replicas(self):
+        request = self.factory.get(reverse('posts:index'))
+        self.assertEqual(self.read_alias(request), READ_ONLY_ALIAS)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaPinTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_write_pins_primary(self):
+        """Подписка (GET с записью) ставит cookie чтения с основной базы."""
+        response = self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'TestAuthor'}))
+        self.assertIn('read_primary', response.cookies)
+
+    def test_read_does_not_pin(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('read_primary', response.cookies)
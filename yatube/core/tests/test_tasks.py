@@ -0,0 +1,206 @@
+import json
+import re
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Post, TimelineEntry
+
+from .. import tasks
+from ..models import Job
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task(name='core.test_record')
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(name='core.test_fail', max_attempts=2)
+def fail():
+    raise ValueError('сбой')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def work(self):
+        call_command('run_workers', processes=0, once=True,
+                     stdout=StringIO())
+
+    def test_enqueue_and_run(self):
+        """Задача ждёт в таблице и выполняется воркером."""
+        job = record.enqueue('a')
+        self.assertEqual(calls, [])
+        self.assertEqual(json.loads(job.payload), {'args': ['a'],
+                                                   'kwargs': {}})
+        with self.assertLogs('yatube.tasks', 'INFO'):
+            self.work()
+        job.refresh_from_db()
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.duration_ms)
+
+    def test_priority_and_delay(self):
+        """Сначала высокий приоритет; отложенная задача ждёт run_at."""
+        record.enqueue('low', priority=-1)
+        record.enqueue('high', priority=5)
+        record.enqueue('later', delay=60)
+        record.enqueue('normal')
+        with self.assertLogs('yatube.tasks', 'INFO'):
+            self.work()
+        self.assertEqual(calls, ['high', 'normal', 'low'])
+        self.assertEqual(Job.objects.get(status=Job.QUEUED).payload,
+                         json.dumps({'args': ['later'], 'kwargs': {}}))
+
+    def test_retry_with_backoff(self):
+        job = fail.enqueue()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('ValueError: сбой', job.last_error)
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(
+            seconds=9))
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_retry_delay_doubles(self):
+        self.assertGreaterEqual(tasks.retry_delay(3), 40)
+        self.assertLess(tasks.retry_delay(3), 45)
+        self.assertLessEqual(tasks.retry_delay(20), 3600 * 1.1)
+
+    def test_requeue_stale(self):
+        """Задачу умершего воркера снова берут после TASK_LOCK_TIMEOUT."""
+        job = record.enqueue('b')
+        tasks.claim('dead:1')
+        Job.objects.filter(id=job.id).update(
+            started=timezone.now() - timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.claim('alive:2'), [job])
+
+    def test_requeued_job_is_not_run_twice(self):
+        """Задачу из порции, которую уже вернули в очередь, прежний
+        воркер пропускает; время начала — момент запуска, а не
+        забора."""
+        first = record.enqueue('first')
+        second = record.enqueue('second')
+        claimed = tasks.claim('slow:1', limit=2)
+        Job.objects.filter(id=second.id).update(
+            started=timezone.now() - timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.claim('alive:2'), [second])
+        with self.assertLogs('yatube.tasks', 'INFO'):
+            started = timezone.now()
+            self.assertIsNotNone(tasks.run(claimed[0]))
+            self.assertIsNone(tasks.run(claimed[1]))
+        self.assertEqual(calls, ['first'])
+        first.refresh_from_db()
+        self.assertGreaterEqual(first.started, started)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        """Задача, которая роняет воркер, не ходит по кругу вечно."""
+        job = fail.enqueue()
+        for attempt in range(1, job.max_attempts + 1):
+            claimed, = tasks.claim(f'dead:{attempt}')
+            tasks.start(claimed)
+            Job.objects.filter(id=job.id).update(
+                started=timezone.now() - timedelta(hours=1))
+            tasks.requeue_stale()
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished)
+        self.assertIn('TASK_LOCK_TIMEOUT', job.last_error)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        self.assertIsNone(record.enqueue('c'))
+        self.assertEqual(calls, ['c'])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_failure_does_not_break_caller(self):
+        """Сбой задачи в режиме TASKS_EAGER логируется, а не
+        пробрасывается в представление."""
+        author = User.objects.create_user(username='TestAuthor')
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.assertIsNone(fail.enqueue())
+        self.assertTrue(User.objects.filter(pk=author.pk).exists())
+
+    def test_stats(self):
+        record.enqueue('d')
+        fail.enqueue()
+        with self.assertLogs('yatube.tasks', 'INFO'):
+            self.work()
+        summary = tasks.stats()
+        self.assertEqual(summary['core.test_record']['done'], 1)
+        self.assertIn('p95', summary['core.test_record']['duration_ms'])
+        self.assertEqual(summary['core.test_fail']['queued'], 1)
+
+        admin = User.objects.create_user(username='TestAdmin',
+                                         is_staff=True)
+        client = Client()
+        client.force_login(admin)
+        response = client.get(reverse('task_metrics'))
+        self.assertEqual(response.json()['core.test_record']['done'], 1)
+
+
+@override_settings(TASKS_EAGER=False)
+class QueuedSideEffectsTests(TestCase):
+
+    def work(self):
+        with self.assertLogs('yatube.tasks', 'INFO'):
+            call_command('run_workers', processes=0, once=True,
+                         stdout=StringIO())
+
+    def test_password_reset_email(self):
+        """Письмо сброса пароля уходит из воркера, а не из запроса."""
+        User.objects.create_user(username='TestUser',
+                                 email='user@example.com',
+                                 password='test-password')
+        response = Client().post(reverse('users:password_reset_form'),
+                                 {'email': 'user@example.com'})
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        # Ссылку с токеном собирает воркер, в очереди её нет.
+        self.assertNotIn('/reset/', Job.objects.get().payload)
+        self.work()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        link = re.search(r'https?://[^/]+(/auth/reset/\S+)',
+                         mail.outbox[0].body).group(1)
+        # Действительный токен уводит на форму нового пароля.
+        response = Client().get(link)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.endswith('/set-password/'))
+
+    def test_fan_out(self):
+        """Пост попадает в ленты подписчиков после выполнения задачи."""
+        author = User.objects.create_user(username='TestAuthor')
+        reader = User.objects.create_user(username='TestReader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(author=author, text='Тестовый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.work()
+        self.assertTrue(TimelineEntry.objects.filter(
+            post=post, user=reader).exists())
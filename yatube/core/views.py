@@ -1,5 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import tasks
+from .metrics import stats
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html',
@@ -16,3 +21,16 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def request_metrics(request):
+    """Перцентили времени и числа запросов по представлениям
+    в этом процессе."""
+    return JsonResponse(stats.summary(), json_dumps_params={'indent': 2})
+
+
+@staff_member_required
+def task_metrics(request):
+    """Очередь, ошибки и длительность фоновых задач."""
+    return JsonResponse(tasks.stats(), json_dumps_params={'indent': 2})
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
 
-from .models import Post, Group, Comment, Follow
+from . import search
+from .models import Post, Group, Comment, Follow, Profile
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +12,18 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_ordering(self, request):
+        # Иначе список пересортирует найденное по умолчанию, по дате,
+        # и порядок bm25 потеряется.
+        if request.GET.get(SEARCH_VAR) and search.is_supported():
+            return search.RANKED
+        return super().get_ordering(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.search(search_term, queryset), False
+
 
 admin.site.register(Post, PostAdmin)
 
@@ -18,3 +32,5 @@ admin.site.register(Group)
 admin.site.register(Comment)
 
 admin.site.register(Follow)
+
+admin.site.register(Profile)
@@ -0,0 +1,286 @@
+"""JSON API для мобильных клиентов.
+
+Ленты сериализуются из .values(): ни моделей, ни шаблонов, только
+нужные столбцы, а автор и группа приходят тем же запросом через JOIN.
+Набор полей ответа задаёт параметр ``fields`` (``?fields=id,text``),
+страницы листаются курсором из ``next``/``previous``.
+
+Авторизация — обычной сессией сайта; пишущие запросы проходят ту же
+проверку CSRF, что и формы (заголовок X-CSRFToken).
+"""
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import Http404, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from . import tasks
+from .forms import CommentForm, PostForm
+from .models import Comment, Follow, Group, Post, User
+from .utils import comments_paginator, cursor_paginator
+
+# Поле ответа → выражение для .values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+# Ключи сортировки нужны курсору, даже если клиент их не просил.
+POST_KEYS = ('pub_date', 'id')
+COMMENT_KEYS = ('created', 'id')
+FORM_TYPES = ('multipart/form-data', 'application/x-www-form-urlencoded')
+
+
+class BadRequest(ValueError):
+    status = 400
+
+
+class UnsupportedMediaType(BadRequest):
+    status = 415
+
+
+def error(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def api_view(*methods):
+    """Допустимые методы, 401 для анонимной записи, ошибки BadRequest
+    и 404 в виде JSON."""
+    def decorator(view):
+        @require_http_methods(methods)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method != 'GET'
+                    and not request.user.is_authenticated):
+                return error('Требуется авторизация.', 401)
+            try:
+                return view(request, *args, **kwargs)
+            except BadRequest as exc:
+                return error(str(exc), exc.status)
+            except Http404:
+                return error('Не найдено.', 404)
+        return wrapper
+    return decorator
+
+
+def requested_fields(request, available):
+    """Поля из ?fields=..., по умолчанию — все."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise BadRequest('Неизвестные поля: {}.'.format(
+            ', '.join(unknown) or raw))
+    return fields
+
+
+def values(queryset, fields, available, keys=()):
+    """queryset.values() только по нужным столбцам."""
+    lookups = dict.fromkeys(available[name] for name in fields)
+    lookups.update(dict.fromkeys(keys))
+    return queryset.values(*lookups)
+
+
+def serialize(row, fields, available):
+    data = {}
+    for name in fields:
+        value = row[available[name]]
+        if name == 'image':
+            value = default_storage.url(value) if value else None
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def page_data(page, fields, available):
+    return {
+        'results': [serialize(row, fields, available) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def posts_page(request, posts):
+    fields = requested_fields(request, POST_FIELDS)
+    page = cursor_paginator(request,
+                            values(posts, fields, POST_FIELDS, POST_KEYS))
+    return JsonResponse(page_data(page, fields, POST_FIELDS))
+
+
+def comments_page(request, post_id, fields):
+    comments = Comment.objects.filter(post_id=post_id)
+    return comments_paginator(
+        request, values(comments, fields, COMMENT_FIELDS, COMMENT_KEYS))
+
+
+def post_data(post_id, fields):
+    row = values(Post.objects.filter(pk=post_id), fields,
+                 POST_FIELDS).first()
+    return serialize(row, fields, POST_FIELDS) if row else None
+
+
+def payload(request):
+    """Данные запроса: JSON-объект или обычная форма с файлами."""
+    if request.content_type in FORM_TYPES or not request.content_type:
+        return form_payload(request)
+    if request.content_type != 'application/json':
+        raise UnsupportedMediaType(
+            f'Неподдерживаемый тип данных {request.content_type}.')
+    try:
+        data = json.loads(request.body.decode() or '{}')
+    except ValueError:
+        raise BadRequest('Некорректный JSON.')
+    if not isinstance(data, dict):
+        raise BadRequest('Ожидается JSON-объект.')
+    return data, None
+
+
+def form_payload(request):
+    # Django разбирает тело формы только у POST.
+    if request.method == 'POST':
+        data, files = request.POST, request.FILES
+    elif request.content_type == 'multipart/form-data':
+        data, files = request.parse_file_upload(request.META, request)
+    else:
+        data, files = QueryDict(request.body, encoding=request.encoding), None
+    return dict(data.items()), files
+
+
+def post_form_data(data, post=None):
+    """Данные для PostForm: группа приходит слагом, как и в ответах.
+    При правке поля, которых нет в запросе, остаются прежними."""
+    current = post.group if post is not None else None
+    if post is not None:
+        data = {'text': post.text,
+                'group': current.slug if current else None,
+                **data}
+    slug = data.get('group')
+    if not slug:
+        group = None
+    elif current is not None and slug == current.slug:
+        group = current
+    else:
+        group = Group.objects.filter(slug=slug).only('id').first()
+        if group is None:
+            raise BadRequest(f'Группа {slug} не найдена.')
+    return {**data, 'group': group.id if group else None}
+
+
+def form_error(form):
+    return error('Некорректные данные.', 400, fields=form.errors)
+
+
+@api_view('GET', 'POST')
+def posts(request):
+    if request.method == 'GET':
+        return posts_page(request, Post.objects.all())
+    data, files = payload(request)
+    form = PostForm(post_form_data(data), files=files)
+    if not form.is_valid():
+        return form_error(form)
+    with transaction.atomic():
+        post = form.save(commit=False)
+        post.author_id = request.user.id
+        post.save()
+        if post.image:
+            tasks.generate_thumbnail.enqueue(post.id)
+    return JsonResponse(post_data(post.id, list(POST_FIELDS)), status=201)
+
+
+@api_view('GET')
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('id'), slug=slug)
+    return posts_page(request, Post.objects.filter(group_id=group.id))
+
+
+@api_view('GET')
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    return posts_page(request, Post.objects.filter(author_id=author.id))
+
+
+@api_view('GET', 'POST', 'PATCH')
+def post_detail(request, post_id):
+    if request.method != 'GET':
+        return post_edit(request, post_id)
+    data = post_data(post_id, requested_fields(request, POST_FIELDS))
+    if data is None:
+        return error('Пост не найден.', 404)
+    comment_fields = list(COMMENT_FIELDS)
+    comments = page_data(comments_page(request, post_id, comment_fields),
+                         comment_fields, COMMENT_FIELDS)
+    del comments['previous']
+    data['comments'] = comments
+    return JsonResponse(data)
+
+
+@transaction.atomic
+def post_edit(request, post_id):
+    post = get_object_or_404(Post.objects.select_related('group'),
+                             pk=post_id)
+    if request.user.id != post.author_id:
+        return error('Редактировать пост может только автор.', 403)
+    data, files = payload(request)
+    form = PostForm(post_form_data(data, post), files=files, instance=post)
+    if not form.is_valid():
+        return form_error(form)
+    image_changed = 'image' in form.changed_data
+    if image_changed:
+        post.thumbnail = ''
+        post.image_variants = ''
+    form.save()
+    if image_changed and post.image:
+        tasks.generate_thumbnail.enqueue(post.id)
+    return JsonResponse(post_data(post.id, list(POST_FIELDS)))
+
+
+@api_view('GET', 'POST')
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    if request.method == 'GET':
+        fields = requested_fields(request, COMMENT_FIELDS)
+        return JsonResponse(page_data(comments_page(request, post.id, fields),
+                                      fields, COMMENT_FIELDS))
+    data, _ = payload(request)
+    form = CommentForm(data)
+    if not form.is_valid():
+        return form_error(form)
+    with transaction.atomic():
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+    fields = list(COMMENT_FIELDS)
+    row = values(Comment.objects.filter(pk=comment.pk), fields,
+                 COMMENT_FIELDS).get()
+    return JsonResponse(serialize(row, fields, COMMENT_FIELDS), status=201)
+
+
+@api_view('POST', 'DELETE')
+@transaction.atomic
+def profile_follow(request, username):
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    if request.method == 'DELETE':
+        Follow.objects.filter(user=request.user, author=author).delete()
+        return JsonResponse({'author': username, 'following': False})
+    if author.id == request.user.id:
+        return error('Нельзя подписаться на самого себя.', 400)
+    Follow.objects.get_or_create(user=request.user, author=author)
+    return JsonResponse({'author': username, 'following': True})
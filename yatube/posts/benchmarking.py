@@ -0,0 +1,72 @@
+"""Общее для команд benchmark и benchmark_concurrency: данные для URL,
+тестовые клиенты, сводка задержек и сохранение отчёта в JSON."""
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.core.management.base import CommandError
+from django.test import Client
+
+from core.metrics import percentile
+
+from .models import Group, Post, Profile
+
+# Адрес не из INTERNAL_IPS, чтобы debug_toolbar не участвовал в замерах.
+REMOTE_ADDR = '192.0.2.1'
+
+
+def url_kwargs():
+    """Аргументы URL: самая большая группа, самый читаемый автор
+    и самый обсуждаемый пост; поиск — по первому слову этого поста."""
+    group = Group.objects.order_by('-posts_count').first()
+    author = Profile.objects.select_related('user').order_by(
+        '-followers_count').first()
+    post = Post.objects.order_by('-comments_count').first()
+    if not (group and author and post):
+        raise CommandError('Нет данных: запустите generate_data.')
+    word = post.text.split()[0] if post.text.split() else ''
+    return ({'slug': group.slug,
+             'username': author.user.username,
+             'post_id': post.id},
+            {'post_search': f'?{urlencode({"q": word})}'})
+
+
+def clients(kwargs):
+    """Анонимный клиент и читатель с самой длинной лентой подписок,
+    который не автор постов из kwargs."""
+    reader = Profile.objects.select_related('user').exclude(
+        user__username=kwargs['username']).order_by(
+        '-following_count').first()
+    user_client = Client(REMOTE_ADDR=REMOTE_ADDR)
+    user_client.force_login(reader.user)
+    return {'guest': Client(REMOTE_ADDR=REMOTE_ADDR),
+            'user': user_client}
+
+
+def summary(timings, elapsed):
+    """Перцентили и среднее задержек в мс и пропускная способность."""
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'rps': round(len(timings) / elapsed, 1),
+    }
+
+
+def save_report(directory, prefix, options, results):
+    """Пишет отчёт в directory/<prefix>-<время>.json и возвращает путь."""
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'options': options,
+        'data': {'posts': Post.objects.count(),
+                 'users': Profile.objects.count()},
+        'results': results,
+    }
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, '{}-{}.json'.format(
+        prefix, datetime.now().strftime('%Y%m%d-%H%M%S')))
+    with open(filename, 'w') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return filename
@@ -0,0 +1,190 @@
+"""Версии содержимого для кэша фрагментов шаблонов.
+
+Ключ фрагмента складывается из имени страницы, номера страницы или
+курсора и хэша областей, которые на ней показаны (общей ленты,
+группы, автора, поста или ленты подписок читателя), вместе с их
+версиями: версии разных групп или постов могут совпасть. Любое изменение
+поста, комментария или подписки увеличивает версии затронутых областей,
+поэтому старые фрагменты просто перестают запрашиваться и вытесняются
+по TTL.
+
+Версии растут при коммите на основной базе, а отставшая реплика ещё
+отдаёт старые строки. Поэтому в ключ фрагментов и кэша страниц входит
+база, с которой читает запрос: отрендеренное с реплики не попадает к
+читателю, который после своей записи читает с основной базы.
+
+Те же версии служат валидатором HTTP: ETag страницы — хэш её ключа
+и читателя, и повторный запрос с If-None-Match получает 304 ещё до
+запросов к базе за лентой и до рендеринга шаблонов. Ими же проверяется
+кэш страниц целиком для анонимных посетителей.
+"""
+import hashlib
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+
+from core.db_routers import read_replica
+
+FEED = 'feed'
+# Порядок «Популярного»: меняется от комментариев и подписок.
+HOT = 'hot'
+# Каталог групп: число постов, последний пост и активность каждой.
+GROUPS = 'groups'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def timeline_scope(user_id):
+    return f'timeline:{user_id}'
+
+
+def _key(scope):
+    return f'posts:version:{scope}'
+
+
+def _new_version():
+    # После вытеснения ключа версия не должна совпасть со старой.
+    return int(time.time() * 1000)
+
+
+def versions(*scopes):
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.set(_key(scope), _new_version(), timeout=None)
+
+
+def bump(*scopes):
+    """Инвалидирует области сразу и ещё раз после коммита транзакции,
+    чтобы параллельный запрос не закэшировал незакоммиченное состояние
+    под новой версией."""
+    _bump(scopes)
+    transaction.on_commit(partial(_bump, scopes))
+
+
+def _source():
+    """База, с которой читает текущий запрос."""
+    return read_replica() or DEFAULT_DB_ALIAS
+
+
+def _fragment_key(request, name, scopes, scope_versions):
+    stamp = hashlib.md5('|'.join((*scopes, scope_versions)).encode())
+    return ':'.join((
+        name,
+        request.GET.get('page', ''),
+        request.GET.get('cursor', ''),
+        stamp.hexdigest(),
+    ))
+
+
+def fragment_key(request, name, *scopes):
+    key = _fragment_key(request, name, scopes, versions(*scopes))
+    return f'{key}:{_source()}'
+
+
+class Page:
+    """Версии, ключ фрагмента и ETag одной страницы.
+
+    scopes — области, показанные в кэшируемых фрагментах; extra —
+    остальные, от которых зависит страница целиком. Версии читаются
+    один раз до запросов к базе, и ими же помечается ответ для кэша
+    анонимных страниц.
+    """
+
+    def __init__(self, request, name, *scopes, extra=()):
+        self.request = request
+        self.scopes = scopes + tuple(extra)
+        self.stamp = versions(*self.scopes)
+        key = _fragment_key(request, name, scopes,
+                            '.'.join(self.stamp.split('.')[:len(scopes)]))
+        # ETag не зависит от реплики: реплика выбирается на каждый
+        # запрос случайно.
+        self.etag = '"{}"'.format(hashlib.md5(':'.join((
+            key, self.stamp, str(request.user.pk or ''),
+        )).encode()).hexdigest())
+        self.fragment_key = f'{key}:{_source()}'
+
+    def not_modified(self):
+        """Ответ 304, если у клиента актуальная страница, иначе None."""
+        response = get_conditional_response(self.request, etag=self.etag)
+        if response is not None:
+            _set_validators(self.request, response, self.etag)
+        return response
+
+    def finish(self, response):
+        """Добавляет ETag и Cache-Control и помечает ответ версиями."""
+        if response.status_code == 200:
+            _set_validators(self.request, response, self.etag)
+            response.cache_stamp = (self.scopes, self.stamp)
+        return response
+
+
+def _set_validators(request, response, etag):
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        # Анонимные страницы одинаковы, их могут отдавать общие кэши.
+        patch_cache_control(response, public=True,
+                            max_age=settings.HTTP_CACHE_MAX_AGE)
+    return response
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'posts:page:{_source()}:{path}'
+
+
+def anonymous_page(view):
+    """Кэш страниц целиком для анонимных GET-запросов по пути и query.
+
+    Ответ хранится вместе с версиями областей, под которыми он
+    отрендерен (Page.finish); попадание — два чтения кэша без
+    обращений к базе, а любое изменение этих областей делает запись
+    недействительной.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = _page_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            scopes, stamp, response = cached
+            if versions(*scopes) == stamp:
+                return get_conditional_response(
+                    request, etag=response['ETag'], response=response)
+        response = view(request, *args, **kwargs)
+        cache_stamp = getattr(response, 'cache_stamp', None)
+        if cache_stamp is not None and not response.cookies:
+            cache.set(key, (*cache_stamp, response),
+                      settings.PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
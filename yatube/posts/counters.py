@@ -0,0 +1,102 @@
+"""Денормализованные счётчики постов, комментариев и подписок
+и сводка групп: последний пост и время последней активности.
+
+Счётчики меняются атомарным UPDATE ... SET n = n + 1 в той же
+транзакции, что и сама запись. Если счётчики разошлись с данными,
+их пересчитывает команда ``manage.py recount_counters``.
+"""
+from django.db.models import (Count, DateTimeField, F, IntegerField,
+                              OuterRef, Subquery)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+def _bump(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def bump_profile(user_id, create=True, **deltas):
+    updated = _bump(Profile.objects.filter(user_id=user_id), **deltas)
+    if not updated and create:
+        Profile.objects.get_or_create(user_id=user_id)
+        recount_profiles(Profile.objects.filter(user_id=user_id))
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        _bump(Group.objects.filter(id=group_id), posts_count=delta)
+
+
+def group_post_added(post):
+    """Новый пост — самый свежий в своей группе."""
+    if post.group_id is not None:
+        Group.objects.filter(id=post.group_id).update(
+            last_post_id=post.id, last_activity=post.pub_date)
+
+
+def group_commented(group_id, moment):
+    if group_id is not None:
+        Group.objects.filter(id=group_id).update(last_activity=moment)
+
+
+def bump_post(post_id, delta):
+    _bump(Post.objects.filter(id=post_id), comments_count=delta)
+
+
+def _count(model, field, outer='pk'):
+    """Подзапрос COUNT(*) строк model, ссылающихся через field
+    на текущую строку внешнего запроса."""
+    counts = (model.objects.filter(**{field: OuterRef(outer)})
+              .order_by().values(field)
+              .annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_profiles(queryset=None):
+    if queryset is None:
+        Profile.objects.bulk_create(
+            (Profile(user_id=user_id) for user_id in
+             User.objects.filter(profile__isnull=True)
+             .values_list('id', flat=True).iterator()),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        queryset = Profile.objects.all()
+    return queryset.update(
+        posts_count=_count(Post, 'author', 'user_id'),
+        followers_count=_count(Follow, 'author', 'user_id'),
+        following_count=_count(Follow, 'user', 'user_id'),
+    )
+
+
+def _newest(queryset, field):
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1],
+                    output_field=DateTimeField())
+
+
+def recount_groups(queryset=None):
+    """Пересчитывает число постов, последний пост и последнюю
+    активность групп; без queryset — всех."""
+    if queryset is None:
+        queryset = Group.objects.all()
+    posts = Post.objects.filter(group=OuterRef('pk'))
+    comments = Comment.objects.filter(post__group=OuterRef('pk'))
+    post_date = _newest(posts, 'pub_date')
+    comment_date = _newest(comments, 'created')
+    return queryset.update(
+        posts_count=_count(Post, 'group'),
+        last_post=Subquery(
+            posts.order_by('-pub_date', '-id').values('id')[:1]),
+        # На SQLite MAX с NULL даёт NULL, поэтому пустые значения
+        # заменяются другим.
+        last_activity=Greatest(Coalesce(post_date, comment_date),
+                               Coalesce(comment_date, post_date)),
+    )
+
+
+def recount_posts():
+    return Post.objects.update(comments_count=_count(Comment, 'post'))
@@ -0,0 +1,240 @@
+"""Уведомления о новых постах через Server-Sent Events.
+
+В каждом процессе один поток раз в LIVE_POLL_INTERVAL секунд читает
+посты с id больше последнего увиденного (диапазон по первичному ключу)
+и публикует их в шину процесса. Открытые потоки /events/ ждут на общем
+Condition (под WSGI — поток сервера на соединение) или на своём
+asyncio.Event (под core.asgi — в цикле событий, без потока) и получают
+события без своих запросов к базе, поэтому число соединений не
+добавляет нагрузки на базу. Источник событий — сама
+таблица постов: уведомления приходят и о постах, созданных в других
+процессах, через API, импорт или админку.
+
+id постов выдаются при вставке, а видны после коммита, поэтому на
+PostgreSQL пост с меньшим id может появиться позже большего. Опрос
+перечитывает последние REORDER_WINDOW id, а шина нумерует события в
+порядке публикации: подписчик ждёт по этому номеру, а не по id поста.
+
+Поток index получает все новые посты, поток follow — посты авторов,
+на которых читатель подписан в момент подключения. id события — id
+поста: после обрыва браузер присылает Last-Event-ID, и пропущенное
+досылается из базы.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from django.urls import reverse
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних событий хранит шина процесса.
+BUFFER_SIZE = 1000
+# Сколько пропущенных постов досылать после переподключения.
+REPLAY_LIMIT = 100
+# Через сколько миллисекунд браузер переподключается после обрыва.
+RETRY_MS = 3000
+# Сколько последних id перечитывает каждый опрос.
+REORDER_WINDOW = 100
+
+Event = namedtuple('Event', 'id author_id')
+
+
+class Broker:
+    """Шина новых постов внутри процесса."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        # Пары (номер публикации, событие).
+        self.events = deque(maxlen=BUFFER_SIZE)
+        self.sequence = 0
+        self.last_id = None
+        # Опубликованные id из окна перечитывания.
+        self.seen = set()
+        # asyncio.Event ожидающих потоков и циклы событий, которым они
+        # принадлежат.
+        self.waiters = {}
+        self.poller = None
+
+    def publish(self, events):
+        with self.condition:
+            for event in events:
+                self.sequence += 1
+                self.events.append((self.sequence, event))
+                self.seen.add(event.id)
+                self.last_id = max(self.last_id or 0, event.id)
+            floor = (self.last_id or 0) - REORDER_WINDOW
+            self.seen = {post_id for post_id in self.seen if post_id > floor}
+            self.condition.notify_all()
+            for woken, loop in self.waiters.items():
+                loop.call_soon_threadsafe(woken.set)
+
+    def cursor(self):
+        """Номер последней публикации и наибольший опубликованный id."""
+        with self.condition:
+            return self.sequence, self.last_id
+
+    def _since(self, position):
+        # Номера растут слева направо: новые события — с правого края.
+        events = []
+        for sequence, event in reversed(self.events):
+            if sequence <= position:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def wait(self, position, timeout):
+        """События после номера position и новый номер; ждёт до
+        timeout секунд, если событий нет."""
+        with self.condition:
+            if self.sequence == position:
+                self.condition.wait(timeout)
+            return self.sequence, self._since(position)
+
+    async def wait_async(self, position, timeout):
+        """То же, что wait, но ждёт в цикле событий: publish будит
+        ожидающего из потока опроса через call_soon_threadsafe."""
+        woken = asyncio.Event()
+        with self.condition:
+            if self.sequence != position:
+                return self.sequence, self._since(position)
+            self.waiters[woken] = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(woken.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                del self.waiters[woken]
+        with self.condition:
+            return self.sequence, self._since(position)
+
+    def poll(self):
+        """Один опрос базы; возвращает число новых постов."""
+        if self.last_id is None:
+            last_id = Post.objects.order_by('-id').values_list(
+                'id', flat=True).first() or 0
+            with self.condition:
+                self.seen = set(Post.objects.filter(
+                    id__gt=last_id - REORDER_WINDOW).values_list(
+                    'id', flat=True))
+                self.last_id = last_id
+            return 0
+        rows = Post.objects.filter(
+            id__gt=self.last_id - REORDER_WINDOW).order_by('id').values_list(
+            'id', 'author_id')[:REORDER_WINDOW + BUFFER_SIZE]
+        events = [Event(*row) for row in rows if row[0] not in self.seen]
+        if events:
+            self.publish(events)
+        return len(events)
+
+    def run(self):
+        while True:
+            close_old_connections()
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception('Не удалось прочитать новые посты')
+            time.sleep(settings.LIVE_POLL_INTERVAL)
+
+    def start(self):
+        """Запоминает последний пост и запускает опрос, если он ещё
+        не идёт."""
+        with self.condition:
+            if self.last_id is None:
+                self.poll()
+            if (settings.LIVE_POLL_INTERVAL
+                    and (self.poller is None or not self.poller.is_alive())):
+                self.poller = threading.Thread(
+                    target=self.run, name='live-posts', daemon=True)
+                self.poller.start()
+
+
+broker = Broker()
+
+
+def missed(after, until):
+    """События, пропущенные после обрыва: посты с id в (after, until]."""
+    rows = list(Post.objects.filter(id__gt=after, id__lte=until).order_by(
+        '-id').values_list('id', 'author_id')[:REPLAY_LIMIT])
+    return [Event(*row) for row in reversed(rows)]
+
+
+def _format(event):
+    data = json.dumps({
+        'id': event.id,
+        'url': reverse('posts:post_detail', kwargs={'post_id': event.id}),
+    })
+    return f'event: post\nid: {event.id}\ndata: {data}\n\n'
+
+
+def last_event_id(request):
+    """id из заголовка Last-Event-ID или None."""
+    try:
+        return int(request.META.get('HTTP_LAST_EVENT_ID', ''))
+    except ValueError:
+        return None
+
+
+def release_connections():
+    """Ожидающий поток не держит соединение с базой."""
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+class EventStream:
+    """Тело ответа text/event-stream; authors — множество id авторов
+    для потока follow или None для всех постов. Итерируется обычным
+    образом (WSGI) и асинхронно (core.asgi)."""
+
+    def __init__(self, request, authors=None):
+        broker.start()
+        self.authors = authors
+        self.position, last_id = broker.cursor()
+        after = last_event_id(request)
+        self.replay = [] if after is None else missed(after, last_id)
+        # Досланный пост мог закоммититься поздно и прийти ещё и из шины.
+        self.replayed = {event.id for event in self.replay}
+
+    def wanted(self, event):
+        return ((self.authors is None or event.author_id in self.authors)
+                and event.id not in self.replayed)
+
+    def head(self):
+        """Начало потока: интервал переподключения и пропущенное."""
+        return [f'retry: {RETRY_MS}\n\n'] + [
+            _format(event) for event in self.replay
+            if self.authors is None or event.author_id in self.authors]
+
+    def chunks(self, batch):
+        if not batch:
+            # Комментарий SSE не даёт прокси закрыть соединение,
+            # а запись в закрытый сокет завершает поток.
+            return [': ping\n\n']
+        return [_format(event) for event in batch if self.wanted(event)]
+
+    def __iter__(self):
+        yield from self.head()
+        release_connections()
+        while True:
+            self.position, batch = broker.wait(
+                self.position, settings.LIVE_HEARTBEAT)
+            yield from self.chunks(batch)
+
+    async def __aiter__(self):
+        for chunk in self.head():
+            yield chunk
+        while True:
+            self.position, batch = await broker.wait_async(
+                self.position, settings.LIVE_HEARTBEAT)
+            for chunk in self.chunks(batch):
+                yield chunk
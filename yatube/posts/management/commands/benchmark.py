@@ -0,0 +1,115 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import benchmarking
+from posts.urls import app_name, urlpatterns
+
+CLIENTS = ('guest', 'user')
+# Только страницы чтения: подписка по GET, комментарии и бесконечные
+# потоки SSE в замеры не входят.
+READ_VIEWS = ('index', 'hot_index', 'group_index', 'group_list', 'profile',
+              'post_detail', 'post_comments', 'post_search', 'follow_index')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95/p99), число SQL-запросов и '
+            'пропускную способность каждого URL приложения posts через '
+            'тестовый клиент на текущей базе и сохраняет результат в JSON. '
+            'С --baseline сравнивает с прошлым прогоном и завершается '
+            'ошибкой при регрессии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на URL и клиента.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument('--only', nargs='*', default=None,
+                            help='Имена URL без пространства имён.')
+        parser.add_argument('--output', default=os.path.join(
+            settings.BASE_DIR, 'benchmarks'))
+        parser.add_argument('--baseline', default=None,
+                            help='JSON прошлого прогона для сравнения.')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='Допустимый рост p95, %%.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+        kwargs, query = benchmarking.url_kwargs()
+        clients = benchmarking.clients(kwargs)
+        results = []
+        for pattern in urlpatterns:
+            if pattern.name not in READ_VIEWS or (
+                    options['only'] and pattern.name not in options['only']):
+                continue
+            path = reverse(f'{app_name}:{pattern.name}', kwargs={
+                name: kwargs[name] for name in pattern.pattern.converters})
+            path += query.get(pattern.name, '')
+            for client_name in CLIENTS:
+                result = self.measure(clients[client_name], path, options)
+                result.update(url=pattern.name, path=path,
+                              client=client_name)
+                results.append(result)
+                self.stdout.write(
+                    '{url:<18} {client:<5} {status} p50 {p50_ms:7.2f} '
+                    'p95 {p95_ms:7.2f} p99 {p99_ms:7.2f} мс, '
+                    'запросов {queries:3}, {rps:8.1f} rps'.format(**result))
+
+        filename = benchmarking.save_report(
+            options['output'], 'benchmark',
+            {name: options[name] for name in ('requests', 'warmup', 'cold')},
+            results)
+        self.stdout.write(self.style.SUCCESS(f'Результат: {filename}'))
+
+        if baseline is not None:
+            self.compare(results, baseline, options['threshold'])
+
+    def measure(self, client, path, options):
+        for _ in range(options['warmup']):
+            client.get(path)
+        timings = []
+        queries = 0
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = client.get(path)
+                timings.append(
+                    (time.perf_counter() - request_started) * 1000)
+            queries = max(queries, len(context))
+        elapsed = time.perf_counter() - started
+        return {'status': response.status_code, 'queries': queries,
+                **benchmarking.summary(timings, elapsed)}
+
+    def compare(self, results, baseline, threshold):
+        baseline = {(row['url'], row['client']): row
+                    for row in baseline['results']}
+        regressions = []
+        for row in results:
+            old = baseline.get((row['url'], row['client']))
+            if old is None:
+                continue
+            if row['queries'] > old['queries']:
+                regressions.append(
+                    f'{row["url"]} ({row["client"]}): запросов '
+                    f'{old["queries"]} → {row["queries"]}')
+            if row['p95_ms'] > old['p95_ms'] * (1 + threshold / 100):
+                regressions.append(
+                    f'{row["url"]} ({row["client"]}): p95 '
+                    f'{old["p95_ms"]} → {row["p95_ms"]} мс')
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, build_environ
+from posts import benchmarking
+from posts.urls import app_name, urlpatterns
+
+READ_VIEWS = ('index', 'group_list', 'profile', 'post_detail',
+              'follow_index')
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI и ASGI (core.asgi) при большом числе '
+            'одновременных клиентов: пропускную способность и p50/p95/p99 '
+            'задержки страниц чтения на текущей базе. WSGI — поток на '
+            'соединение, как у многопоточного сервера; ASGI — цикл событий '
+            'и пул из --threads потоков. Сеть не участвует, результат '
+            'сохраняется в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Одновременных клиентов.')
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Запросов на URL и режим.')
+        parser.add_argument('--threads', type=int,
+                            default=settings.ASGI_THREADS,
+                            help='Размер пула ASGI.')
+        parser.add_argument('--only', nargs='*', default=None,
+                            help='Имена URL без пространства имён.')
+        parser.add_argument('--output', default=os.path.join(
+            settings.BASE_DIR, 'benchmarks'))
+
+    def handle(self, *args, **options):
+        kwargs, _ = benchmarking.url_kwargs()
+        reader = benchmarking.clients(kwargs)['user']
+        cookie = reader.cookies[settings.SESSION_COOKIE_NAME]
+        headers = [(b'cookie', f'{cookie.key}={cookie.value}'.encode())]
+        wsgi = WSGIHandler()
+        results = []
+        for pattern in urlpatterns:
+            name = pattern.name
+            if name not in READ_VIEWS or (
+                    options['only'] and name not in options['only']):
+                continue
+            path = reverse(f'{app_name}:{name}', kwargs={
+                key: kwargs[key] for key in pattern.pattern.converters})
+            scope = {'type': 'http', 'method': 'GET', 'path': path,
+                     'query_string': b'', 'headers': headers,
+                     'client': (benchmarking.REMOTE_ADDR, 0),
+                     'server': ('testserver', 80)}
+            for mode in MODES:
+                if mode == 'wsgi':
+                    result = self.measure_wsgi(wsgi, scope, options)
+                else:
+                    result = self.measure_asgi(
+                        ASGIHandler(wsgi, options['threads'], 1),
+                        scope, options)
+                result.update(url=name, path=path, mode=mode)
+                results.append(result)
+                self.stdout.write(
+                    '{url:<13} {mode} {status} p50 {p50_ms:8.2f} '
+                    'p95 {p95_ms:8.2f} p99 {p99_ms:8.2f} мс, '
+                    '{rps:8.1f} rps'.format(**result))
+
+        filename = benchmarking.save_report(
+            options['output'], 'concurrency',
+            {name: options[name]
+             for name in ('concurrency', 'requests', 'threads')},
+            results)
+        self.stdout.write(self.style.SUCCESS(f'Результат: {filename}'))
+
+    def measure_wsgi(self, application, scope, options):
+        """Каждый клиент — поток, который сам выполняет свои запросы."""
+        statuses = []
+
+        def request():
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response['status'] = int(status.split(' ', 1)[0])
+
+            started = time.perf_counter()
+            result = application(build_environ(scope), start_response)
+            try:
+                b''.join(result)
+            finally:
+                result.close()
+            statuses.append(response['status'])
+            return (time.perf_counter() - started) * 1000
+
+        def client(count):
+            return [request() for _ in range(count)]
+
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            started = time.perf_counter()
+            timings = sum(executor.map(client, self.shares(options)), [])
+            elapsed = time.perf_counter() - started
+        return self.summary(timings, elapsed, statuses)
+
+    def measure_asgi(self, application, scope, options):
+        """Каждый клиент — корутина; Django работает в пуле потоков."""
+        statuses = []
+
+        async def request():
+            messages = [{'type': 'http.request', 'body': b''}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            return (time.perf_counter() - started) * 1000
+
+        async def client(count):
+            return [await request() for _ in range(count)]
+
+        async def run():
+            started = time.perf_counter()
+            timings = await asyncio.gather(*(
+                client(count) for count in self.shares(options)))
+            return sum(timings, []), time.perf_counter() - started
+
+        timings, elapsed = asyncio.run(run())
+        application.pages.shutdown()
+        application.streams.shutdown()
+        return self.summary(timings, elapsed, statuses)
+
+    def shares(self, options):
+        """Запросы, поровну разделённые между клиентами."""
+        clients = min(options['concurrency'], options['requests'])
+        share, extra = divmod(options['requests'], clients)
+        return [share + (number < extra) for number in range(clients)]
+
+    def summary(self, timings, elapsed, statuses):
+        return {'status': max(set(statuses), key=statuses.count),
+                **benchmarking.summary(timings, elapsed)}
@@ -0,0 +1,237 @@
+import io
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import counters, search, timeline, trending
+from posts.models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса степенного распределения по рангам 1..count."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу правдоподобными данными для нагрузочных '
+            'тестов: пользователи, группы, посты с картинками, подписки '
+            'со степенным распределением и комментарии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок на пользователя в среднем.')
+        parser.add_argument('--comments', type=float, default=3,
+                            help='Комментариев на пост в среднем.')
+        parser.add_argument('--images', type=float, default=0.2,
+                            help='Доля постов с картинкой.')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель степенного закона '
+                                 'популярности авторов.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросаны посты.')
+        parser.add_argument('--prefix', default='bench',
+                            help='Префикс имён пользователей и слагов.')
+        parser.add_argument('--password', default='bench',
+                            help='Пароль всех созданных пользователей.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.sentences = [self.fake.sentence(nb_words=12)
+                          for _ in range(1000)]
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            group_ids = self.step('Группы', self.create_groups)
+            user_ids = self.step('Пользователи', self.create_users)
+            # Популярные авторы и пишут чаще, и читают их больше.
+            self.author_weights = zipf_weights(len(user_ids),
+                                               options['exponent'])
+            self.step('Подписки', self.create_follows, user_ids)
+            post_ids = self.step('Посты', self.create_posts,
+                                 user_ids, group_ids)
+            self.step('Комментарии', self.create_comments,
+                      user_ids, post_ids)
+            self.step('Счётчики', self.recount)
+            self.step('Ленты подписок', timeline.rebuild)
+            self.step('Популярность', trending.rescore)
+        self.step('Поисковый индекс', search.rebuild)
+        # Версии кэша ничего не знают о данных, загруженных мимо сигналов.
+        cache.clear()
+
+    def step(self, title, function, *args):
+        started = time.monotonic()
+        result = function(*args)
+        count = len(result) if isinstance(result, list) else result
+        self.stdout.write(f'{title}: {count} '
+                          f'({time.monotonic() - started:.1f} с)')
+        return result
+
+    def bulk(self, model, objects):
+        """bulk_create порциями, не держа все объекты в памяти."""
+        objects = iter(objects)
+        total = 0
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                return total
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+
+    def text(self, sentences):
+        return ' '.join(self.random.choices(self.sentences, k=sentences))
+
+    def date(self):
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, self.options['days'] * 86400))
+
+    def create_groups(self):
+        prefix = self.options['prefix']
+        self.bulk(Group, (
+            Group(title=self.fake.catch_phrase()[:200],
+                  slug=f'{prefix}-group-{i}',
+                  description=self.text(3))
+            for i in range(self.options['groups'])
+        ))
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-group-').values_list('id', flat=True))
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        password = make_password(self.options['password'])
+        self.bulk(User, (
+            User(username=f'{prefix}{i}',
+                 first_name=self.fake.first_name(),
+                 last_name=self.fake.last_name(),
+                 password=password,
+                 date_joined=self.now)
+            for i in range(self.options['users'])
+        ))
+        # На SQLite bulk_create не возвращает id, поэтому читаем их;
+        # порядок имён задаёт ранг популярности.
+        users = dict(User.objects.filter(
+            username__startswith=prefix).values_list('username', 'id'))
+        user_ids = [users[f'{prefix}{i}']
+                    for i in range(self.options['users'])
+                    if f'{prefix}{i}' in users]
+        self.bulk(Profile, (Profile(user_id=user_id)
+                            for user_id in user_ids))
+        return user_ids
+
+    def create_follows(self, user_ids):
+        mean = self.options['follows']
+        if not mean:
+            return 0
+
+        def follows():
+            for user_id in user_ids:
+                wanted = min(int(self.random.expovariate(1 / mean)) + 1,
+                             len(user_ids) - 1)
+                authors = set(self.random.choices(
+                    user_ids, cum_weights=self.author_weights, k=wanted))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        return self.bulk(Follow, follows())
+
+    def create_images(self, count=20):
+        names = []
+        for i in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            name = f'posts/{self.options["prefix"]}-{i}.jpg'
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            names.append(default_storage.save(
+                name, ContentFile(buffer.getvalue())))
+        return names
+
+    def create_posts(self, user_ids, group_ids):
+        images = self.create_images() if self.options['images'] else []
+        # Даты по возрастанию, чтобы id шли в том же порядке, что и время.
+        dates = sorted(self.date() for _ in range(self.options['posts']))
+
+        def posts():
+            for pub_date in dates:
+                image = ''
+                if images and self.random.random() < self.options['images']:
+                    image = self.random.choice(images)
+                yield Post(
+                    text=self.text(self.random.randint(1, 6)),
+                    pub_date=pub_date,
+                    author_id=self.random.choices(
+                        user_ids, cum_weights=self.author_weights)[0],
+                    group_id=(self.random.choice(group_ids)
+                              if group_ids and self.random.random() < 0.7
+                              else None),
+                    image=image,
+                )
+
+        last_id = Post.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            self.bulk(Post, posts())
+        return list(Post.objects.filter(
+            id__gt=last_id).values_list('id', 'pub_date'))
+
+    def create_comments(self, user_ids, posts):
+        mean = self.options['comments']
+        if not mean:
+            return 0
+
+        def comments():
+            for post_id, pub_date in posts:
+                for _ in range(int(self.random.expovariate(1 / mean))):
+                    delay = self.random.expovariate(1 / 3600)
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.random.choice(user_ids),
+                        text=self.text(1),
+                        created=min(pub_date + timedelta(seconds=delay),
+                                    self.now),
+                    )
+
+        with explicit_dates(Comment._meta.get_field('created')):
+            return self.bulk(Comment, comments())
+
+    def recount(self):
+        return (counters.recount_profiles() + counters.recount_groups()
+                + counters.recount_posts())
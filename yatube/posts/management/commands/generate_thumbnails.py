@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит превью картинок постов, для которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Сколько постов обработать за проход.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Повторять проход каждые N секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            done = self.generate_pending(options['limit'])
+            self.stdout.write(self.style.SUCCESS(f'Построено превью: {done}'))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
+
+    def generate_pending(self, limit):
+        pending = (Post.objects.exclude(image='').filter(thumbnail='')
+                   .order_by('-pub_date').values_list('id', flat=True))
+        if limit:
+            pending = pending[:limit]
+        done = 0
+        for post_id in pending.iterator():
+            try:
+                done += thumbnails.generate(post_id)
+            except Exception:
+                # Причина уже в логе; остальные посты строятся дальше.
+                continue
+        return done
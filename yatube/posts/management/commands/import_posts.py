@@ -0,0 +1,292 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from posts import counters, search, timeline, transfer, trending
+from posts.models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+# Страниц WAL между автоматическими checkpoint на время загрузки
+# (около 400 МБ при странице 4 КБ; по умолчанию SQLite — 1000).
+IMPORT_WAL_AUTOCHECKPOINT = 100000
+
+
+@contextmanager
+def rare_checkpoints():
+    """Реже переносит WAL в основной файл SQLite: при частых checkpoint
+    одни и те же страницы индексов пишутся на диск много раз."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA wal_autocheckpoint')
+        previous, = cursor.fetchone()
+        cursor.execute(
+            f'PRAGMA wal_autocheckpoint = {IMPORT_WAL_AUTOCHECKPOINT}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA wal_autocheckpoint = {previous}')
+            if not connection.in_atomic_block:
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+class Command(BaseCommand):
+    help = ('Загружает каталог, созданный export_posts: порции по '
+            '--batch-size записей, каждая в своей транзакции. '
+            'Пользователи и группы с теми же username и slug '
+            'не дублируются. Посты и комментарии получают id источника '
+            'со сдвигом на максимальный id в базе, поэтому повтор '
+            'порции после сбоя ничего не удваивает, а --resume продолжает '
+            'с последней сохранённой порции.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Каталог выгрузки.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить с последней сохранённой '
+                                 'порции.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        path = os.path.join(directory, transfer.DATA_FILE)
+        if not os.path.exists(path):
+            raise CommandError(f'Нет файла {path}.')
+        self.media = os.path.join(directory, transfer.MEDIA_DIR)
+        self.checkpoint_path = os.path.join(directory,
+                                            transfer.CHECKPOINT_FILE)
+        self.checkpoint = self.load_checkpoint(options['resume'])
+        self.counts = dict.fromkeys(transfer.SECTIONS, 0)
+        self.seconds = dict.fromkeys(transfer.SECTIONS, 0.0)
+
+        started = self.last_flush = time.monotonic()
+        decode = json.JSONDecoder().decode
+        with open(path, 'rb') as file, rare_checkpoints():
+            file.seek(self.checkpoint['position'])
+            position = self.checkpoint['position']
+            section, batch = None, []
+            for line in file:
+                position += len(line)
+                if not line.strip():
+                    continue
+                record = decode(line.decode())
+                if batch and (record['model'] != section
+                              or len(batch) >= options['batch_size']):
+                    self.flush(section, batch, position - len(line))
+                    batch = []
+                section = record['model']
+                batch.append(record)
+            if batch:
+                self.flush(section, batch, position)
+        for section, count in self.counts.items():
+            self.stdout.write(f'{section}: {count} ({self.rate(section)})')
+        total = sum(self.counts.values())
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'Всего записей: {total} за {elapsed:.1f} с '
+                          f'({total / max(elapsed, 1e-9):.0f} в секунду)')
+
+        self.finish()
+        os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
+
+    def load_checkpoint(self, resume):
+        if not resume and os.path.exists(self.checkpoint_path):
+            # Новые сдвиги id задублировали бы уже загруженные посты.
+            raise CommandError(
+                f'Есть незавершённая загрузка ({self.checkpoint_path}): '
+                'продолжите её с --resume или удалите этот файл.')
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as file:
+                checkpoint = json.load(file)
+            self.stdout.write(
+                f'Продолжаю с байта {checkpoint["position"]}')
+            return checkpoint
+        return {
+            'position': 0,
+            'post_offset': Post.objects.aggregate(
+                last=Max('id'))['last'] or 0,
+            'comment_offset': Comment.objects.aggregate(
+                last=Max('id'))['last'] or 0,
+        }
+
+    def save_checkpoint(self, position):
+        self.checkpoint['position'] = position
+        partial = self.checkpoint_path + '.partial'
+        with open(partial, 'w') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(partial, self.checkpoint_path)
+
+    def flush(self, section, batch, position):
+        with transaction.atomic():
+            getattr(self, f'load_{section}')(batch)
+        self.save_checkpoint(position)
+        self.counts[section] += len(batch)
+        # Время порции вместе с чтением и разбором её строк.
+        now = time.monotonic()
+        self.seconds[section] += now - self.last_flush
+        self.last_flush = now
+
+    def rate(self, section):
+        seconds = self.seconds[section]
+        return f'{self.counts[section] / max(seconds, 1e-9):.0f} в секунду'
+
+    def user_ids(self, batch, *keys):
+        usernames = {record[key] for record in batch for key in keys}
+        return dict(User.objects.filter(
+            username__in=usernames).values_list('username', 'id'))
+
+    def load_user(self, batch):
+        password = make_password(None)
+        User.objects.bulk_create([
+            User(username=record['username'],
+                 first_name=record['first_name'],
+                 last_name=record['last_name'],
+                 date_joined=transfer.parse_date(record['date_joined']),
+                 password=password)
+            for record in batch
+        ], ignore_conflicts=True)
+        Profile.objects.bulk_create([
+            Profile(user_id=user_id)
+            for user_id in self.user_ids(batch, 'username').values()
+        ], ignore_conflicts=True)
+
+    def load_group(self, batch):
+        Group.objects.bulk_create([
+            Group(slug=record['slug'], title=record['title'],
+                  description=record['description'])
+            for record in batch
+        ], ignore_conflicts=True)
+
+    def load_follow(self, batch):
+        users = self.user_ids(batch, 'user', 'author')
+        Follow.objects.bulk_create([
+            Follow(user_id=users[record['user']],
+                   author_id=users[record['author']])
+            for record in batch
+        ], ignore_conflicts=True)
+
+    def load_post(self, batch):
+        users = self.user_ids(batch, 'author')
+        groups = dict(Group.objects.filter(
+            slug__in={record['group'] for record in batch}
+        ).values_list('slug', 'id'))
+        offset = self.checkpoint['post_offset']
+        self.insert(Post, ('id', 'text', 'pub_date', 'author_id', 'group_id',
+                           'image'), [
+            (offset + record['id'],
+             record['text'],
+             self.adapt_date(record['pub_date']),
+             users[record['author']],
+             groups.get(record['group']),
+             self.copy_image(record['image']))
+            for record in batch
+        ])
+
+    def load_comment(self, batch):
+        users = self.user_ids(batch, 'author')
+        post_offset = self.checkpoint['post_offset']
+        offset = self.checkpoint['comment_offset']
+        self.insert(Comment, ('id', 'post_id', 'author_id', 'text',
+                              'created'), [
+            (offset + record['id'],
+             post_offset + record['post'],
+             users[record['author']],
+             record['text'],
+             self.adapt_date(record['created']))
+            for record in batch
+        ])
+
+    def adapt_date(self, value):
+        # SQLite хранит даты строкой в UTC без пояса: выгруженную дату
+        # в UTC достаточно переписать, не разбирая.
+        if connection.vendor == 'sqlite' and value.endswith('+00:00'):
+            return value[:-6].replace('T', ' ')
+        return connection.ops.adapt_datetimefield_value(
+            transfer.parse_date(value))
+
+    def insert(self, model, fields, rows):
+        """Вставка одним executemany с пропуском конфликтов.
+
+        Для постов и комментариев bulk_create большую часть времени
+        готовит значения полей в компиляторе запроса, поэтому строки
+        приходят уже приведёнными к типам базы. Остальные поля модели
+        получают значения по умолчанию."""
+        ops = connection.ops
+        meta = model._meta
+        rest = [field for field in meta.concrete_fields
+                if field.attname not in fields]
+        columns = [meta.get_field(name).column for name in fields]
+        columns += [field.column for field in rest]
+        defaults = tuple(field.get_db_prep_save(field.get_default(),
+                                                connection)
+                         for field in rest)
+        sql = '{} {} ({}) VALUES ({}) {}'.format(
+            ops.insert_statement(ignore_conflicts=True),
+            ops.quote_name(meta.db_table),
+            ', '.join(ops.quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+            ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [row + defaults for row in rows])
+
+    def copy_image(self, name):
+        """Имя картинки в хранилище. Файл с тем же именем и содержимым
+        уже есть (повтор порции) — берётся он, иначе файл сохраняется
+        под свободным именем, чтобы не указать на чужую картинку."""
+        if not name:
+            return name
+        source = os.path.join(self.media, name)
+        if not os.path.exists(source):
+            # Выгрузка --no-images в то же хранилище.
+            if default_storage.exists(name):
+                return name
+            self.stderr.write(f'Нет файла картинки: {name}')
+            return ''
+        if default_storage.exists(name) and self.same_file(source, name):
+            return name
+        with open(source, 'rb') as file:
+            return default_storage.save(name, File(file))
+
+    def same_file(self, source, name):
+        if os.path.getsize(source) != default_storage.size(name):
+            return False
+        with open(source, 'rb') as file, default_storage.open(name) as stored:
+            while True:
+                chunk = file.read(1 << 16)
+                if chunk != stored.read(1 << 16):
+                    return False
+                if not chunk:
+                    return True
+
+    def finish(self):
+        """Производные данные: bulk_create обходит сигналы."""
+        started = time.monotonic()
+        with transaction.atomic():
+            counters.recount_profiles()
+            counters.recount_groups()
+            counters.recount_posts()
+            timeline.rebuild()
+            trending.rescore()
+        search.rebuild()
+        # Явные id: на PostgreSQL последовательности нужно сдвинуть.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment]):
+                cursor.execute(sql)
+        cache.clear()
+        self.stdout.write(f'Счётчики, ленты, популярность и поиск '
+                          f'пересчитаны ({time.monotonic() - started:.1f} с)')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters, trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев и подписок '
+            'и счёт популярности постов.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            profiles = counters.recount_profiles()
+            groups = counters.recount_groups()
+            posts = counters.recount_posts()
+            trending.rescore()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано профилей: {profiles}, групп: {groups}, '
+            f'постов: {posts}'
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:59
+
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def event_score(weight, moment):
+    age = (moment - EPOCH).total_seconds() / settings.HOT_HALF_LIFE
+    return math.log(weight) + age * math.log(2)
+
+
+def fill_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    scores = {}
+    for post_id, pub_date, followers in Post.objects.values_list(
+            'id', 'pub_date', 'author__profile__followers_count'):
+        scores[post_id] = [event_score(
+            1 + settings.HOT_FOLLOWER_WEIGHT * (followers or 0), pub_date)]
+    for post_id, created in Comment.objects.values_list('post_id',
+                                                         'created'):
+        scores[post_id].append(event_score(settings.HOT_COMMENT_WEIGHT,
+                                           created))
+    updates = []
+    for post_id, terms in scores.items():
+        top = max(terms)
+        updates.append((top + math.log(
+            sum(math.exp(term - top) for term in terms)), post_id))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'UPDATE posts_post SET hot_score = %s WHERE id = %s', updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, help_text='Счёт с затуханием во времени, см. posts.trending', verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
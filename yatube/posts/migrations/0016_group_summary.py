@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def newest(queryset, field):
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1],
+                    output_field=models.DateTimeField())
+
+
+def fill_summary(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    posts = Post.objects.filter(group=OuterRef('pk'))
+    post_date = newest(posts, 'pub_date')
+    comment_date = newest(Comment.objects.filter(post__group=OuterRef('pk')),
+                          'created')
+    Group.objects.update(
+        last_post=Subquery(posts.order_by('-pub_date', '-id').values('id')[:1]),
+        last_activity=Greatest(Coalesce(post_date, comment_date),
+                               Coalesce(comment_date, post_date)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Последний пост или комментарий в группе', null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='last_post',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Последний пост'),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
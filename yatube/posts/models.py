@@ -1,16 +1,55 @@
+import json
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_listing(self):
+        """Всё, что выводят ленты: автор и группа каждого поста."""
+        return self.select_related('author', 'group')
+
+    def for_detail(self):
+        """Страница поста: ещё и счётчики автора."""
+        return self.select_related('author__profile', 'group')
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def for_listing(self):
+        return self.select_related('author').order_by('created', 'id')
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Заголовок')
     slug = models.SlugField(unique=True,
                             max_length=50,
                             verbose_name='Уникальный фрагмент URL-адреса')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(default=0,
+                                              editable=False,
+                                              verbose_name='Число постов')
+    last_post = models.ForeignKey(
+        'Post',
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Последний пост'
+    )
+    last_activity = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Последняя активность',
+        help_text='Последний пост или комментарий в группе'
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -45,15 +84,68 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.ImageField(
+        verbose_name='Превью картинки',
+        upload_to='posts/thumbnails/',
+        blank=True,
+        editable=False
+    )
+    image_variants = models.TextField(
+        verbose_name='Варианты картинки',
+        help_text='JSON: формат → [[ширина, имя файла], ...]',
+        blank=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
+    hot_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность',
+        help_text='Счёт с затуханием во времени, см. posts.trending'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['-hot_score', '-id'],
+                         name='post_hot_idx'),
+        ]
 
     def __str__(self):
         return self.text[:settings.SLICE_LENGTH]
 
+    def _srcset(self, variant):
+        try:
+            variants = json.loads(self.image_variants or '{}')[variant]
+        except (ValueError, TypeError, KeyError):
+            return ''
+        return ', '.join(
+            f'{default_storage.url(name)} {width}w'
+            for width, name in variants
+        )
+
+    @property
+    def thumbnail_srcset(self):
+        return self._srcset('fallback')
+
+    @property
+    def thumbnail_webp_srcset(self):
+        return self._srcset('webp')
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -77,9 +169,15 @@ class Comment(models.Model):
         verbose_name='Дата и время создания комментария'
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -105,3 +203,69 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_follow'
             )
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-id'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class Profile(models.Model):
+    """Счётчики автора, которые иначе пришлось бы считать COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Число постов')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
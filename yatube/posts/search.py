@@ -0,0 +1,90 @@
+"""Полнотекстовый поиск по Post.text.
+
+На SQLite индекс — виртуальная таблица FTS5 posts_post_fts, в которой
+rowid совпадает с id поста, а текст хранится уже в виде основ слов
+(posts.stemmer), поэтому «постами» находит «пост». Индекс обновляется
+сигналами при создании, правке и удалении поста, результаты
+сортируются по bm25. На других СУБД поиск откатывается к icontains.
+"""
+from django.db import connection, transaction
+
+from .models import Post
+from .stemmer import tokenize
+
+FTS_TABLE = 'posts_post_fts'
+# Порядок результатов: сначала релевантные, среди равных — новые.
+RANKED = ('rank', '-pub_date')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post_id, text):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+            [post_id, ' '.join(tokenize(text))])
+
+
+def unindex_post(post_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [post_id])
+
+
+def rebuild(batch_size=1000):
+    """Перестраивает индекс целиком; возвращает число постов."""
+    if not is_supported():
+        return 0
+    total = 0
+    # Одна транзакция: в autocommit каждая строка коммитилась бы отдельно.
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        batch = []
+        for post_id, text in Post.objects.values_list(
+                'id', 'text').iterator():
+            batch.append((post_id, ' '.join(tokenize(text))))
+            if len(batch) >= batch_size:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                    batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                batch)
+            total += len(batch)
+    return total
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, каждая как префикс."""
+    return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+
+def search(query, queryset=None):
+    """Посты, подходящие под запрос, от более релевантных к менее."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        for word in query.split():
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id',
+               f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+        select={'rank': f'bm25({FTS_TABLE})'},
+    ).order_by(*RANKED)
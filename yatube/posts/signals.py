@@ -0,0 +1,148 @@
+import threading
+
+from django.conf import settings
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import caching, counters, search, tasks, timeline, trending
+from .models import Comment, Follow, Group, Post, Profile, User
+
+# id постов, которые сейчас удаляются в этом потоке: их комментарии
+# уходят каскадом, и пересчитывать по ним пост незачем.
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        caching.bump(caching.GROUPS)
+    else:
+        caching.bump(caching.group_scope(instance.id), caching.GROUPS)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    caching.bump(caching.GROUPS)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+def _invalidate_post(post, previous_group_id=None, extra=()):
+    scopes = [caching.FEED,
+              caching.author_scope(post.author_id),
+              caching.post_scope(post.id),
+              *extra]
+    group_ids = {post.group_id, previous_group_id} - {None}
+    for group_id in group_ids:
+        scopes.append(caching.group_scope(group_id))
+    if group_ids:
+        scopes.append(caching.GROUPS)
+    caching.bump(*scopes)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_post(instance, getattr(instance, '_previous_group_id', None))
+    search.index_post(instance.id, instance.text)
+    if created:
+        counters.bump_profile(instance.author_id, posts_count=1)
+        counters.bump_group(instance.group_id, 1)
+        counters.group_post_added(instance)
+        trending.post_published(instance)
+        tasks.fan_out_post.enqueue(instance.id)
+    elif instance._previous_group_id != instance.group_id:
+        # Перенесённый пост мог быть последним в старой группе
+        # или оказаться не самым новым в новой.
+        counters.recount_groups(Group.objects.filter(id__in=[
+            instance._previous_group_id, instance.group_id]))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    _deleting_posts().add(instance.id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.id)
+    # Пост мог быть в «Популярном».
+    _invalidate_post(instance, extra=(caching.HOT,))
+    search.unindex_post(instance.id)
+    counters.bump_profile(instance.author_id, create=False,
+                          posts_count=-1)
+    counters.bump_group(instance.group_id, -1)
+    if instance.group_id is not None:
+        # Если пост был последним в группе, SET_NULL уже обнулил ссылку.
+        counters.recount_groups(Group.objects.filter(
+            id=instance.group_id, last_post__isnull=True))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_post(instance.post_id, 1)
+        trending.comment_added(instance)
+        group_id = instance.post.group_id
+        counters.group_commented(group_id, instance.created)
+        scopes = [caching.post_scope(instance.post_id), caching.HOT]
+        if group_id is not None:
+            scopes.append(caching.GROUPS)
+        caching.bump(*scopes)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in _deleting_posts():
+        return
+    counters.bump_post(instance.post_id, -1)
+    trending.rescore(Post.objects.filter(id=instance.post_id))
+    caching.bump(caching.post_scope(instance.post_id), caching.HOT)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_profile(instance.author_id, followers_count=1)
+        counters.bump_profile(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        trending.follower_added(instance.author_id)
+        caching.bump(caching.timeline_scope(instance.user_id), caching.HOT)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_profile(instance.author_id, create=False,
+                          followers_count=-1)
+    counters.bump_profile(instance.user_id, create=False,
+                          following_count=-1)
+    timeline.prune(instance.user_id, instance.author_id)
+    followers = Profile.objects.filter(
+        user_id=instance.author_id).values_list(
+        'followers_count', flat=True).first()
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        # Посты, написанные, пока автор был выше порога, не разложены.
+        tasks.fan_out_author.enqueue(instance.author_id)
+    caching.bump(caching.timeline_scope(instance.user_id))
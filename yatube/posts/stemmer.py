@@ -0,0 +1,143 @@
+"""Стеммер русского языка по алгоритму Snowball (Портер).
+
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+
+
+def _regions(word):
+    """Начала областей RV и R2."""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+@lru_cache(maxsize=None)
+def _longest_first(groups):
+    first, second = groups
+    return sorted(first + second, key=len, reverse=True)
+
+
+def _remove_ending(word, rv, groups):
+    """Отрезает самое длинное окончание из groups внутри RV.
+
+    Окончания первой группы допустимы только после «а» или «я».
+    Возвращает слово без окончания или None.
+    """
+    second = groups[1]
+    for suffix in _longest_first(groups):
+        start = len(word) - len(suffix)
+        if start < rv or not word.endswith(suffix):
+            continue
+        if suffix in second:
+            return word[:start]
+        if start - 1 >= rv and word[start - 1] in 'ая':
+            return word[:start]
+        return None
+    return None
+
+
+def _step1(word, rv):
+    """Окончания деепричастий, прилагательных, глаголов и
+    существительных."""
+    stemmed = _remove_ending(word, rv, PERFECTIVE_GERUND)
+    if stemmed is not None:
+        return stemmed
+    word = _remove_ending(word, rv, REFLEXIVE) or word
+    stemmed = _remove_ending(word, rv, ADJECTIVE)
+    if stemmed is not None:
+        return _remove_ending(stemmed, rv, PARTICIPLE) or stemmed
+    return (_remove_ending(word, rv, VERB)
+            or _remove_ending(word, rv, NOUN)
+            or word)
+
+
+def _step2(word, rv):
+    if word.endswith('и') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def _step3(word, r2):
+    for suffix in DERIVATIONAL:
+        if word.endswith(suffix) and len(word) - len(suffix) >= r2:
+            return word[:-len(suffix)]
+    return word
+
+
+def _step4(word, rv):
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    for suffix in SUPERLATIVE:
+        if word.endswith(suffix) and len(word) - len(suffix) >= rv:
+            word = word[:-len(suffix)]
+            if word.endswith('нн') and len(word) - 2 >= rv:
+                word = word[:-1]
+            return word
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    word = _step1(word, rv)
+    word = _step2(word, rv)
+    word = _step3(word, r2)
+    return _step4(word, rv)
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, русские — в виде основ."""
+    tokens = []
+    for word in WORD_RE.findall(text.lower().replace('ё', 'е')):
+        tokens.append(stem(word) if CYRILLIC_RE.search(word) else word)
+    return [token for token in tokens if token]
@@ -0,0 +1,30 @@
+from core.tasks import task
+
+from . import caching, thumbnails, timeline
+from .models import Post
+
+
+@task(priority=-10)
+def generate_thumbnail(post_id):
+    """Превью и варианты картинки для srcset."""
+    thumbnails.generate(post_id)
+
+
+@task
+def fan_out_post(post_id):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date').first()
+    if post is None:
+        return
+    timeline.fan_out_post(post)
+    # Ленты подписок, закэшированные до раскладки, устарели.
+    caching.bump(caching.FEED)
+
+
+@task
+def fan_out_author(author_id):
+    """Раскладывает посты автора, опустившегося до TIMELINE_FANOUT_LIMIT
+    подписчиков."""
+    timeline.author_demoted(author_id)
+    caching.bump(caching.FEED)
@@ -0,0 +1,172 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Тестовый пост {i}')
+            for i in range(5)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Тестовый комментарий')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def post_json(self, client, url, data, method='post'):
+        return getattr(client, method)(url, json.dumps(data),
+                                       content_type='application/json')
+
+    @override_settings(QUANTITY_OF_POSTS=2)
+    def test_feeds_paginate_by_cursor(self):
+        """Ленты листаются курсором от новых постов к старым."""
+        urls = (
+            reverse('api:posts'),
+            reverse('api:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('api:profile_posts',
+                    kwargs={'username': self.author.username}),
+        )
+        expected = [post.id for post in reversed(self.posts)]
+        for url in urls:
+            with self.subTest(url=url):
+                ids, cursor = [], ''
+                while True:
+                    data = self.guest_client.get(
+                        url, {'cursor': cursor} if cursor else {}).json()
+                    ids += [post['id'] for post in data['results']]
+                    cursor = data['next']
+                    if not cursor:
+                        break
+                self.assertEqual(ids, expected)
+
+    def test_sparse_fields(self):
+        """Параметр fields ограничивает набор полей ответа."""
+        response = self.guest_client.get(reverse('api:posts'),
+                                         {'fields': 'text,author'})
+        post = response.json()['results'][0]
+        self.assertEqual(post, {'text': self.post.text,
+                                'author': self.author.username})
+        response = self.guest_client.get(reverse('api:posts'),
+                                         {'fields': 'text,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_queries(self):
+        """Лента — один запрос без экземпляров моделей."""
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('api:posts'))
+
+    def test_post_detail_with_comments(self):
+        response = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.id}))
+        data = response.json()
+        self.assertEqual(data['group'], self.group.slug)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']['results']],
+            ['Тестовый комментарий'])
+        response = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_post(self):
+        url = reverse('api:posts')
+        data = {'text': 'Пост из API', 'group': self.group.slug}
+        response = self.post_json(self.guest_client, url, data)
+        self.assertEqual(response.status_code, 401)
+        response = self.post_json(self.reader_client, url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], self.reader.username)
+        self.assertTrue(Post.objects.filter(
+            text='Пост из API', group=self.group, author=self.reader
+        ).exists())
+        response = self.post_json(self.reader_client, url, {'text': ''})
+        self.assertIn('text', response.json()['fields'])
+
+    def test_edit_post(self):
+        """Правка меняет только переданные поля и доступна только автору."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        response = self.post_json(self.reader_client, url,
+                                  {'text': 'Чужая правка'}, method='patch')
+        self.assertEqual(response.status_code, 403)
+        response = self.post_json(self.author_client, url,
+                                  {'group': self.other_group.slug},
+                                  method='patch')
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.other_group)
+        self.assertEqual(self.post.text, 'Тестовый пост 4')
+
+    def test_edit_post_with_form(self):
+        """PATCH формой разбирается так же, как POST; неизвестный тип
+        тела — 415, несуществующий пост — 404 в JSON."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        response = self.author_client.patch(
+            url, encode_multipart(BOUNDARY, {'text': 'Правка формой'}),
+            content_type=MULTIPART_CONTENT)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.get(pk=self.post.id).text,
+                         'Правка формой')
+
+        response = self.author_client.patch(url, 'text=Правка',
+                                            content_type='text/plain')
+        self.assertEqual(response.status_code, 415)
+
+        response = self.post_json(
+            self.author_client,
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+            {'text': 'Правка'}, method='patch')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Не найдено.'})
+
+    def test_add_comment(self):
+        url = reverse('api:post_comments', kwargs={'post_id': self.post.id})
+        response = self.post_json(self.author_client, url,
+                                  {'text': 'Ответ автора'})
+        self.assertEqual(response.status_code, 201)
+        response = self.guest_client.get(url, {'fields': 'author,text'})
+        self.assertEqual(response.json()['results'][-1],
+                         {'author': self.author.username,
+                          'text': 'Ответ автора'})
+
+    def test_follow_and_unfollow(self):
+        url = reverse('api:profile_follow',
+                      kwargs={'username': self.author.username})
+        response = self.reader_client.post(url)
+        self.assertEqual(response.json(), {'author': self.author.username,
+                                           'following': True})
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        self.reader_client.delete(url)
+        self.assertFalse(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        response = self.author_client.post(url)
+        self.assertEqual(response.status_code, 400)
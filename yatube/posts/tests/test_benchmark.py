@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .. import search
+from ..models import Comment, Follow, Group, Post, Profile, TimelineEntry
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDataTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('generate_data', users=30, groups=3, posts=200,
+                     follows=5, comments=2, images=0.5, seed=1,
+                     stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_volumes(self):
+        self.assertEqual(Profile.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(Comment.objects.exists())
+
+    def test_power_law_followers(self):
+        """Самый популярный автор собирает заметную долю подписок."""
+        followers = sorted(Profile.objects.values_list(
+            'followers_count', flat=True), reverse=True)
+        self.assertEqual(sum(followers), Follow.objects.count())
+        self.assertGreater(followers[0], 3 * followers[len(followers) // 2])
+
+    def test_derived_data(self):
+        """Счётчики, ленты и поиск согласованы с загруженными данными."""
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        follow = Follow.objects.first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=follow.user_id,
+                                         author=follow.author_id).count(),
+            Post.objects.filter(author=follow.author_id).count())
+        word = post.text.split()[0]
+        self.assertIn(post, search.search(word))
+
+    def test_benchmark(self):
+        """Замеряются только страницы чтения: подписка по GET
+        в прогон не попадает."""
+        output = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+        follows = Follow.objects.count()
+        call_command('benchmark', requests=3, warmup=1,
+                     only=['index', 'post_detail', 'profile_follow'],
+                     output=output, stdout=StringIO())
+        self.assertEqual(Follow.objects.count(), follows)
+        filename, = os.listdir(output)
+        path = os.path.join(output, filename)
+        with open(path) as file:
+            report = json.load(file)
+        self.assertEqual(
+            {(row['url'], row['client']) for row in report['results']},
+            {('index', 'guest'), ('index', 'user'),
+             ('post_detail', 'guest'), ('post_detail', 'user')})
+        for row in report['results']:
+            self.assertEqual(row['status'], 200)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+
+        for row in report['results']:
+            row['queries'] = 0
+        with open(path, 'w') as file:
+            json.dump(report, file)
+        with self.assertRaisesMessage(CommandError, 'запросов'):
+            call_command('benchmark', requests=3, warmup=1,
+                         only=['index', 'post_detail'], output=output,
+                         baseline=path, stdout=StringIO())
+
+
+class BenchmarkConcurrencyTests(TransactionTestCase):
+    """Клиенты работают в своих потоках и видят только
+    зафиксированные данные."""
+
+    def test_compare_modes(self):
+        call_command('generate_data', users=10, groups=2, posts=30,
+                     follows=3, comments=1, images=0, seed=1,
+                     stdout=StringIO())
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output, ignore_errors=True)
+        call_command('benchmark_concurrency', concurrency=4, requests=8,
+                     threads=2, only=['index', 'follow_index'],
+                     output=output, stdout=StringIO())
+        filename, = os.listdir(output)
+        with open(os.path.join(output, filename)) as file:
+            report = json.load(file)
+        self.assertEqual(
+            {(row['url'], row['mode']) for row in report['results']},
+            {('index', 'wsgi'), ('index', 'asgi'),
+             ('follow_index', 'wsgi'), ('follow_index', 'asgi')})
+        for row in report['results']:
+            self.assertEqual(row['status'], 200)
@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без рендеринга."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(self.guest_client, url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_modified_after_changes(self):
+        """Новый пост и комментарий меняют ETag затронутых страниц."""
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls}
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Новый пост')
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_cache_control(self):
+        """Анонимные страницы публичны, страницы пользователей — нет."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.guest_client.get(url)
+                reader = self.reader_client.get(url)
+                self.assertIn('public', guest['Cache-Control'])
+                self.assertIn('private', reader['Cache-Control'])
+                self.assertIn('Cookie', guest['Vary'])
+                self.assertNotEqual(guest['ETag'], reader['ETag'])
+
+    def test_follow_changes_profile(self):
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        etag = self.reader_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+    def test_not_modified_skips_feed_queries(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class AnonymousPageCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_cached_without_queries(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second.content, first.content)
+
+    def test_invalidated_by_changes(self):
+        """Правка поста и комментарий сразу видны на затронутых страницах."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'Исправленный пост')
+        detail = self.urls[-1]
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Свежий комментарий')
+        self.assertContains(self.guest_client.get(detail),
+                            'Свежий комментарий')
+
+    def test_other_pages_stay_cached(self):
+        """Комментарий не сбрасывает страницы лент."""
+        index = self.urls[0]
+        self.guest_client.get(index)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Комментарий')
+        with self.assertNumQueries(0):
+            self.guest_client.get(index)
+
+    def test_query_string_is_part_of_key(self):
+        index = self.urls[0]
+        self.guest_client.get(index)
+        with self.assertNumQueries(2):
+            self.guest_client.get(index + '?page=2')
+
+    def test_authenticated_bypass(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                response = self.author_client.get(url)
+                self.assertEqual(response.context['user'], self.author)
@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_counters_follow_views(self):
+        """Счётчики меняются при создании поста, комментария и подписки."""
+        self.author_client.post(reverse('posts:post_create'),
+                                data={'text': 'Текст', 'group': self.group.id})
+        post = Post.objects.get()
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Комментарий'})
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_post_delete_cost_does_not_grow_with_comments(self):
+        """Каскад комментариев не пересчитывает удаляемый пост на
+        каждый комментарий."""
+        queries = []
+        for count in (1, 20):
+            post = Post.objects.create(author=self.author, text='Пост')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=self.reader, text=str(number))
+                for number in range(count))
+            with CaptureQueriesContext(connection) as context:
+                post.delete()
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_recount_counters_repairs_drift(self):
+        """Команда recount_counters восстанавливает счётчики."""
+        post = Post.objects.create(author=self.author, text='Текст',
+                                   group=self.group)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.update(posts_count=42, followers_count=42,
+                               following_count=42)
+        Group.objects.update(posts_count=42)
+        Post.objects.update(comments_count=42)
+
+        call_command('recount_counters', stdout=StringIO())
+
+        profile = self.profile(self.author)
+        self.assertEqual(profile.posts_count, 1)
+        self.assertEqual(profile.followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_group_summary(self):
+        """Последний пост и активность группы следуют за постами
+        и комментариями."""
+        first = Post.objects.create(author=self.author, text='Первый',
+                                    group=self.group)
+        second = Post.objects.create(author=self.author, text='Второй',
+                                     group=self.group)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post, second)
+        self.assertEqual(self.group.last_activity, second.pub_date)
+
+        comment = Comment.objects.create(post=first, author=self.reader,
+                                         text='Комментарий')
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post, second)
+        self.assertEqual(self.group.last_activity, comment.created)
+
+        second.group = None
+        second.save()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post, first)
+        self.assertEqual(self.group.posts_count, 1)
+
+        first.delete()
+        self.group.refresh_from_db()
+        self.assertIsNone(self.group.last_post)
+        self.assertIsNone(self.group.last_activity)
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_recount_group_summary(self):
+        post = Post.objects.create(author=self.author, text='Текст',
+                                   group=self.group)
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Текст')
+        Group.objects.update(last_post=None, last_activity=None)
+        call_command('recount_counters', stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.last_post, post)
+        self.assertEqual(self.group.last_activity, comment.created)
@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Post, Group, Follow
+from .. import timeline
+from ..models import Post, Group, Follow, TimelineEntry
 
 User = get_user_model()
 
@@ -109,3 +110,70 @@ class FollowTests(TestCase):
             self.reverse_follow_index).context['page_obj'][0]
 
         self.assertNotEqual(new_post, post_from_context)
+
+    def test_timeline_fan_out_and_prune(self):
+        """Пост раскладывается по лентам подписчиков, а при отписке
+        записи ленты удаляются."""
+        self.authorized_client.post(
+            reverse(self.profile_follow, kwargs={
+                    'username': self.username}),
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user1, post=self.post).exists())
+
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user1, post=new_post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user2).exists())
+
+        self.authorized_client.post(
+            reverse(self.profile_unfollow, kwargs={
+                    'username': self.username}),
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user1).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_read_on_request(self):
+        """Посты авторов с большим числом подписчиков не раскладываются
+        по лентам, но попадают в ленту при чтении."""
+        self.authorized_client.post(
+            reverse(self.profile_follow, kwargs={
+                    'username': self.username}),
+        )
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        page_obj = self.authorized_client.get(
+            self.reverse_follow_index).context['page_obj']
+        self.assertEqual(list(page_obj), [new_post, self.post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_demoted_author_posts_fanned_out(self):
+        """Посты, написанные, пока у автора было больше подписчиков,
+        чем порог, не пропадают из ленты, когда он опускается ниже."""
+        for client in (self.authorized_client, self.authorized_client2):
+            client.post(reverse(self.profile_follow, kwargs={
+                'username': self.username}))
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=new_post).exists())
+
+        self.authorized_client2.post(reverse(self.profile_unfollow, kwargs={
+            'username': self.username}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user1, post=new_post).exists())
+        page_obj = self.authorized_client.get(
+            self.reverse_follow_index).context['page_obj']
+        self.assertEqual(list(page_obj), [new_post, self.post])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_rebuild_keeps_latest_posts(self):
+        """Перестроенная лента берёт у автора только последние посты."""
+        Follow.objects.create(user=self.user1, author=self.user)
+        posts = [Post.objects.create(author=self.user, text=f'Пост {i}')
+                 for i in range(3)]
+        self.assertEqual(timeline.rebuild(), 2)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post_id', flat=True)),
+            {posts[1].id, posts[2].id})
@@ -1,12 +1,18 @@
+import os
 import shutil
 import tempfile
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
+from core.models import Job
+from core.tasks import claim, run
+
+from .. import thumbnails
 from ..models import Group, Post, User, Comment
+from ..tasks import generate_thumbnail
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -145,3 +151,67 @@ class PostCreateFormTests(TestCase):
 
         self.assertEqual(Comment.objects.count(), comments_count)
         self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_EAGER=False)
+    def test_thumbnail_generated_off_request(self):
+        """Превью строится задачей очереди отдельно от запроса
+        и выводится из поля thumbnail."""
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        self.authorized_client.post(
+            self.POST_CREATE_URL,
+            data={'text': 'Пост с картинкой',
+                  'image': SimpleUploadedFile(name='thumb.gif',
+                                              content=small_gif,
+                                              content_type='image/gif')},
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertFalse(post.thumbnail)
+        self.assertTrue(Job.objects.filter(
+            name='posts.generate_thumbnail',
+            payload__contains=str(post.id)).exists())
+        detail_url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        # Пока превью нет, страница показывает оригинал, а не строит
+        # превью в запросе.
+        response = self.authorized_client.get(detail_url)
+        self.assertContains(response, post.image.url)
+        self.assertNotContains(response, 'type="image/webp"')
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_MEDIA_ROOT, 'cache')))
+
+        self.assertTrue(thumbnails.generate(post.id))
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+
+        self.assertIn('.webp 480w', post.thumbnail_webp_srcset)
+        self.assertIn(' 1440w', post.thumbnail_srcset)
+
+        # Закэшированный фрагмент без превью больше не отдаётся.
+        response = self.authorized_client.get(detail_url)
+        self.assertContains(response, post.thumbnail.url)
+        self.assertContains(response, 'type="image/webp"')
+
+    @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_EAGER=False)
+    def test_thumbnail_failure_retried(self):
+        """Ошибка построения превью возвращает задачу в очередь."""
+        post = Post.objects.create(
+            author=self.author, text='Битая картинка',
+            image=SimpleUploadedFile(name='broken.gif',
+                                     content=b'not an image',
+                                     content_type='image/gif'))
+        job = generate_thumbnail.enqueue(post.id)
+        claimed = {item.id: item for item in claim('test:1', limit=10)}
+        with self.assertLogs('posts.thumbnails', 'ERROR'), \
+                self.assertLogs('yatube.tasks', 'WARNING'):
+            run(claimed[job.id])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+GROUP_INDEX_URL = reverse('posts:group_index')
+
+
+class GroupIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def add_groups(self, count, start=0):
+        for number in range(start, start + count):
+            group = Group.objects.create(title=f'Группа {number:03}',
+                                         slug=f'group-{number}',
+                                         description='Описание')
+            for text in ('Старый пост', f'Новый пост {number}'):
+                Post.objects.create(author=self.author, group=group,
+                                    text=text)
+
+    def test_summary_shown(self):
+        self.add_groups(2)
+        response = self.client.get(GROUP_INDEX_URL)
+        groups = list(response.context['page_obj'])
+        self.assertEqual([group.title for group in groups],
+                         ['Группа 000', 'Группа 001'])
+        self.assertEqual(groups[0].posts_count, 2)
+        self.assertContains(response, 'Новый пост 1')
+        self.assertNotContains(response, 'Старый пост')
+
+    @override_settings(QUANTITY_OF_GROUPS=50)
+    def test_constant_queries(self):
+        """Число запросов не зависит от числа групп на странице."""
+        self.add_groups(2)
+        with self.assertNumQueries(2):
+            self.client.get(GROUP_INDEX_URL)
+        self.add_groups(20, start=2)
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(GROUP_INDEX_URL)
+
+    def test_new_post_refreshes_cached_page(self):
+        self.add_groups(1)
+        self.client.get(GROUP_INDEX_URL)
+        Post.objects.create(author=self.author, group=Group.objects.get(),
+                            text='Самый новый пост')
+        self.assertContains(self.client.get(GROUP_INDEX_URL),
+                            'Самый новый пост')
@@ -0,0 +1,69 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from .. import timeline
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    """Основные запросы страниц читают данные по индексу,
+    без полного сканирования и сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.author,
+                                       group=cls.group,
+                                       text='Тестовый пост')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset):
+        plan = self.query_plan(queryset)
+        self.assertIn('INDEX', plan, plan)
+        self.assertNotIn('TEMP B-TREE', plan, plan)
+        self.assertNotRegex(plan, r'SCAN (TABLE )?\w+$', plan)
+
+    def test_list_queries_use_indexes(self):
+        """index, group_list, profile, post_detail и follow_index."""
+        queries = {
+            'index': Post.objects.for_listing(),
+            'group_list': self.group.posts.for_listing(),
+            'profile': self.author.posts.for_listing(),
+            'comments': self.post.comments.for_listing(),
+            'follow_index': timeline.feed(self.reader),
+            'followers': Follow.objects.filter(
+                author=self.author).values_list('user_id', flat=True),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name=name):
+                self.assertUsesIndex(queryset[:10])
+
+    def test_cursor_queries_use_indexes(self):
+        """Курсорная пагинация по (pub_date, id) идёт по индексу."""
+        queries = {
+            'index': Post.objects.all(),
+            'group_list': self.group.posts.all(),
+            'profile': self.author.posts.all(),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name=name):
+                self.assertUsesIndex(
+                    queryset.order_by('-pub_date', '-id')[:10])
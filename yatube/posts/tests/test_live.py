@@ -0,0 +1,121 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import live
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class BrokerTests(SimpleTestCase):
+
+    def test_wait_returns_new_events(self):
+        broker = live.Broker()
+        broker.publish([live.Event(1, 10), live.Event(2, 20)])
+        self.assertEqual(broker.wait(0, timeout=0),
+                         (2, [live.Event(1, 10), live.Event(2, 20)]))
+        self.assertEqual(broker.wait(1, timeout=0), (2, [live.Event(2, 20)]))
+
+    def test_wait_times_out(self):
+        broker = live.Broker()
+        broker.publish([live.Event(1, 10)])
+        self.assertEqual(broker.wait(1, timeout=0.01), (1, []))
+
+    def test_wait_async_woken_from_thread(self):
+        broker = live.Broker()
+
+        async def wait():
+            waiting = asyncio.ensure_future(broker.wait_async(0, timeout=5))
+            await asyncio.sleep(0)
+            await asyncio.get_running_loop().run_in_executor(
+                None, broker.publish, [live.Event(1, 10)])
+            return await waiting
+
+        self.assertEqual(asyncio.run(wait()), (1, [live.Event(1, 10)]))
+        self.assertFalse(broker.waiters)
+
+
+class PollTests(TestCase):
+
+    def test_late_commit_is_published(self):
+        """Пост, закоммиченный позже поста с большим id, не теряется и
+        не публикуется дважды."""
+        author = User.objects.create_user(username='TestAuthor')
+        late, newest = (Post.objects.create(author=author, text=text)
+                        for text in ('Поздний', 'Новый'))
+        late_id = late.id
+        late.delete()
+        broker = live.Broker()
+        broker.poll()
+        position, last_id = broker.cursor()
+        self.assertEqual(last_id, newest.id)
+        Post.objects.create(id=late_id, author=author, text='Поздний')
+        self.assertEqual(broker.poll(), 1)
+        self.assertEqual(broker.poll(), 0)
+        self.assertEqual(broker.wait(position, timeout=0),
+                         (position + 1, [live.Event(late_id, author.id)]))
+
+
+@override_settings(LIVE_POLL_INTERVAL=0, LIVE_HEARTBEAT=0.01)
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.stranger = User.objects.create_user(username='TestStranger')
+        cls.reader = User.objects.create_user(username='TestReader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        patcher = mock.patch.object(live, 'broker', live.Broker())
+        self.broker = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def open(self, client, url, **headers):
+        response = client.get(url, **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b'retry: 3000\n\n')
+        return chunks
+
+    def next_event(self, chunks):
+        """Следующее событие, пропуская пустые комментарии."""
+        for _ in range(10):
+            chunk = next(chunks).decode()
+            if not chunk.startswith(':'):
+                return chunk
+        self.fail('Событие не пришло')
+
+    def test_index_gets_every_post(self):
+        chunks = self.open(Client(), reverse('posts:index_events'))
+        post = Post.objects.create(author=self.stranger, text='Пост')
+        self.broker.poll()
+        self.assertEqual(self.next_event(chunks), (
+            f'event: post\nid: {post.id}\n'
+            f'data: {{"id": {post.id}, "url": "/posts/{post.id}/"}}\n\n'))
+
+    def test_follow_gets_followed_authors_only(self):
+        chunks = self.open(self.reader_client,
+                           reverse('posts:follow_events'))
+        Post.objects.create(author=self.stranger, text='Чужой пост')
+        post = Post.objects.create(author=self.author, text='Пост автора')
+        self.broker.poll()
+        self.assertIn(f'id: {post.id}\n', self.next_event(chunks))
+
+    def test_follow_requires_login(self):
+        response = Client().get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_replay_after_reconnect(self):
+        """С Last-Event-ID досылаются посты, пропущенные за обрыв."""
+        first = Post.objects.create(author=self.author, text='Первый')
+        missed = Post.objects.create(author=self.author, text='Пропущенный')
+        chunks = self.open(Client(), reverse('posts:index_events'),
+                           HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertIn(f'id: {missed.id}\n', self.next_event(chunks))
@@ -55,3 +55,57 @@ class PaginatorViewsTest(TestCase):
                                      settings.QUANTITY_OF_POSTS)
                     self.assertEqual(len(response2.context['page_obj']),
                                      self.QUANTITY_OF_POSTS_ON_THE_SECOND_PAGE)
+
+
+class CursorPaginatorViewsTest(TestCase):
+
+    QUANTITY_OF_POSTS_ON_THE_SECOND_PAGE = 3
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test-group')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {i}', group=self.group,
+                 author=self.user)
+            for i in range(settings.QUANTITY_OF_POSTS
+                           + self.QUANTITY_OF_POSTS_ON_THE_SECOND_PAGE)
+        )
+        self.GROUP_LIST = reverse('posts:group_list', kwargs={'slug':
+                                  f'{self.group.slug}'})
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Курсорная пагинация проходит все посты без повторов
+        и возвращается на предыдущую страницу.
+        """
+        first = self.guest_client.get(self.GROUP_LIST + '?cursor=')
+        first_page = first.context['page_obj']
+        self.assertTrue(first_page.is_cursor)
+        self.assertEqual(len(first_page), settings.QUANTITY_OF_POSTS)
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+
+        second = self.guest_client.get(
+            self.GROUP_LIST + f'?cursor={first_page.next_cursor}')
+        second_page = second.context['page_obj']
+        self.assertEqual(len(second_page),
+                         self.QUANTITY_OF_POSTS_ON_THE_SECOND_PAGE)
+        self.assertFalse(second_page.has_next())
+        ids = [post.id for post in first_page] + [
+            post.id for post in second_page]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('-pub_date', '-id')
+                      .values_list('id', flat=True)))
+
+        back = self.guest_client.get(
+            self.GROUP_LIST + f'?cursor={second_page.previous_cursor}')
+        self.assertEqual([post.id for post in back.context['page_obj']],
+                         [post.id for post in first_page])
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(self.GROUP_LIST + '?cursor=!!!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.QUANTITY_OF_POSTS)
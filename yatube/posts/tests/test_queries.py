@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(TestCase):
+    """Число SQL-запросов страницы не зависит от числа постов
+    на странице и комментариев к посту, в том числе постов
+    с картинками."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def image(self, name):
+        return SimpleUploadedFile(name=f'{name}.gif', content=SMALL_GIF,
+                                  content_type='image/gif')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def add_content(self, prefix, posts, comments):
+        for i in range(posts):
+            author = User.objects.create_user(username=f'{prefix}Author{i}')
+            Follow.objects.create(user=self.reader, author=author)
+            post = Post.objects.create(author=author, group=self.group,
+                                       text=f'Пост {i}')
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Пост автора {i}',
+                                image=self.image(f'{prefix}{i}'))
+        # И картинка, превью которой ещё не построено.
+        with override_settings(TASKS_EAGER=False):
+            post = Post.objects.create(author=self.author, group=self.group,
+                                       text='Пост без превью',
+                                       image=self.image(f'{prefix}-raw'))
+        for i in range(comments):
+            commenter = User.objects.create_user(
+                username=f'{prefix}Commenter{i}')
+            Comment.objects.create(post=post, author=commenter,
+                                   text=f'Комментарий {i}')
+        return post
+
+    def urls(self, post):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse('posts:group_list',
+                                        kwargs={'slug': self.group.slug}),
+            'posts:profile': reverse('posts:profile',
+                                     kwargs={'username': self.author}),
+            'posts:post_detail': reverse('posts:post_detail',
+                                         kwargs={'post_id': post.id}),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:hot_index': reverse('posts:hot_index'),
+        }
+
+    def count_queries(self, url):
+        cache.clear()
+        self.reader_client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def measure(self, post):
+        return {name: self.count_queries(url)
+                for name, url in self.urls(post).items()}
+
+    @override_settings(QUANTITY_OF_POSTS=20)
+    def test_query_budget(self):
+        small = self.measure(self.add_content('small', posts=2, comments=1))
+        large = self.measure(self.add_content('large', posts=12, comments=15))
+        # Бюджеты из настроек, включая два запроса авторизации: сессия
+        # и пользователь.
+        for name in small:
+            with self.subTest(view=name):
+                self.assertEqual(small[name], large[name])
+                self.assertLessEqual(
+                    large[name], settings.REQUEST_QUERY_BUDGETS[name])
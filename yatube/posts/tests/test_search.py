@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(SimpleTestCase):
+
+    def test_russian_word_forms(self):
+        """Разные формы слова сводятся к одной основе."""
+        words = {
+            'постами': 'пост',
+            'вавилонской': 'вавилонск',
+            'важнейшими': 'важн',
+            'ёлки': 'елк',
+            'улыбнулась': 'улыбнул',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class SearchViewTests(TestCase):
+
+    SEARCH_URL = reverse('posts:post_search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor',
+                                              is_staff=True,
+                                              is_superuser=True)
+        cls.post = Post.objects.create(author=cls.author,
+                                       text='Красивые зимние ёлки')
+        Post.objects.create(author=cls.author, text='Летний пляж')
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query):
+        response = self.client.get(self.SEARCH_URL, {'q': query})
+        return [post.text for post in response.context['page_obj']]
+
+    def test_search_finds_word_forms(self):
+        """Поиск находит пост по другой форме слова."""
+        self.assertEqual(self.found('ёлка зимняя'), ['Красивые зимние ёлки'])
+        self.assertEqual(self.found('КРАСИВАЯ'), ['Красивые зимние ёлки'])
+        self.assertEqual(self.found('море'), [])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Осенние листья'
+        post.save()
+        self.assertEqual(self.found('ёлки'), [])
+        self.assertEqual(self.found('листьями'), ['Осенние листья'])
+        post.delete()
+        self.assertEqual(self.found('листья'), [])
+
+    def test_admin_uses_index(self):
+        """Поиск в админке использует тот же индекс."""
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ёлкам'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.post])
+
+    def test_admin_orders_by_rank(self):
+        """Найденное в админке идёт по релевантности, а не по дате."""
+        relevant = Post.objects.get(pk=self.post.pk)
+        Post.objects.create(author=self.author,
+                            text='Ёлки, палки и ещё много других слов '
+                                 'вокруг одного упоминания')
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ёлки'})
+        self.assertEqual(response.context['cl'].result_list[0], relevant)
@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from .. import transfer
+from ..management.commands.import_posts import Command as ImportCommand
+from ..models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.image_post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            group=cls.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+        for number in range(5):
+            post = Post.objects.create(author=cls.author,
+                                       text=f'Тестовый пост {number}')
+            Comment.objects.create(post=post, author=cls.reader,
+                                   text=f'Комментарий {number}')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, transfer.DATA_FILE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, **options):
+        call_command('export_posts', self.directory, stdout=StringIO(),
+                     **options)
+
+    def import_(self, **options):
+        call_command('import_posts', self.directory, stdout=StringIO(),
+                     **options)
+
+    def snapshot(self):
+        return (
+            sorted(Post.objects.values_list('author__username', 'text',
+                                            'group__slug', 'pub_date')),
+            sorted(Comment.objects.values_list('post__text', 'text',
+                                               'created')),
+            sorted(Follow.objects.values_list('user__username',
+                                              'author__username')),
+        )
+
+    def clear(self):
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        Group.objects.all().delete()
+        default_storage.delete(self.image_post.image.name)
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка в пустую базу восстанавливают данные,
+        картинки и счётчики."""
+        expected = self.snapshot()
+        self.export()
+        self.assertTrue(os.path.exists(os.path.join(
+            self.directory, transfer.MEDIA_DIR, self.image_post.image.name)))
+        self.clear()
+        self.import_()
+        self.assertEqual(self.snapshot(), expected)
+        image_post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(default_storage.exists(image_post.image.name))
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 6)
+        self.assertEqual(Group.objects.get().posts_count, 1)
+
+    def test_import_keeps_existing_rows(self):
+        """Повторная загрузка добавляет посты рядом с существующими,
+        не дублируя пользователей, группы и подписки."""
+        self.export()
+        self.import_()
+        self.assertEqual(Post.objects.count(), 12)
+        self.assertEqual(Comment.objects.count(), 10)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_does_not_reuse_other_image(self):
+        """Чужой файл с тем же именем не подменяет картинку поста."""
+        self.export()
+        self.clear()
+        name = self.image_post.image.name
+        default_storage.save(name, ContentFile(b'other image'))
+        self.import_()
+        image_post = Post.objects.get(text='Пост с картинкой')
+        self.assertNotEqual(image_post.image.name, name)
+        with default_storage.open(image_post.image.name) as file:
+            self.assertEqual(file.read(), SMALL_GIF)
+        with default_storage.open(name) as file:
+            self.assertEqual(file.read(), b'other image')
+        default_storage.delete(image_post.image.name)
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(SMALL_GIF))
+
+    def test_import_resume(self):
+        """После сбоя --resume догружает остаток без повторов."""
+        expected = self.snapshot()
+        self.export()
+        self.clear()
+        flush = ImportCommand.flush
+        calls = []
+
+        def failing_flush(command, *args):
+            if len(calls) == 4:
+                raise KeyboardInterrupt
+            calls.append(args)
+            flush(command, *args)
+
+        with mock.patch.object(ImportCommand, 'flush', failing_flush):
+            with self.assertRaises(KeyboardInterrupt):
+                self.import_(batch_size=2)
+        self.assertLess(Post.objects.count(), 6)
+        with self.assertRaisesMessage(CommandError, '--resume'):
+            self.import_(batch_size=2)
+        self.import_(batch_size=2, resume=True)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_export_resume(self):
+        """--resume отбрасывает недописанную строку и продолжает."""
+        self.export()
+        with open(self.path, 'rb') as file:
+            complete = file.read()
+        with open(self.path, 'wb') as file:
+            file.write(complete[:len(complete) // 2])
+        self.export(resume=True)
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), complete)
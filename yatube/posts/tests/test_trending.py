@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.reader = User.objects.create_user(username='TestReader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_post(self, text, hours_ago=0):
+        post = Post.objects.create(author=self.author, text=text)
+        Post.objects.filter(id=post.id).update(
+            pub_date=timezone.now() - timedelta(hours=hours_ago))
+        trending.rescore(Post.objects.filter(id=post.id))
+        return post
+
+    def hot_texts(self):
+        response = Client().get(reverse('posts:hot_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def score(self, post):
+        return Post.objects.get(id=post.id).hot_score
+
+    def test_newer_post_ranks_higher(self):
+        self.create_post('Старый пост', hours_ago=5)
+        self.create_post('Новый пост')
+        self.assertEqual(self.hot_texts(), ['Новый пост', 'Старый пост'])
+
+    def test_comment_raises_post(self):
+        """Комментарий поднимает пост выше более нового без обсуждения;
+        страница сразу видит новый порядок."""
+        old = self.create_post('Обсуждаемый пост', hours_ago=1)
+        self.create_post('Новый пост')
+        self.assertEqual(self.hot_texts(), ['Новый пост', 'Обсуждаемый пост'])
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': old.id}),
+            data={'text': 'Комментарий'})
+        self.assertEqual(self.hot_texts(), ['Обсуждаемый пост', 'Новый пост'])
+
+    def test_incremental_score_matches_rescore(self):
+        post = self.create_post('Пост', hours_ago=3)
+        for number in range(3):
+            Comment.objects.create(post=post, author=self.reader,
+                                   text=f'Комментарий {number}')
+        incremental = self.score(post)
+        trending.rescore(Post.objects.filter(id=post.id))
+        self.assertAlmostEqual(incremental, self.score(post), places=6)
+
+    def test_deleted_comment_rescores(self):
+        post = self.create_post('Пост')
+        before = self.score(post)
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        self.assertGreater(self.score(post), before)
+        comment.delete()
+        self.assertAlmostEqual(self.score(post), before, places=6)
+
+    def test_follow_raises_recent_posts(self):
+        """Новый подписчик расширяет охват только свежих постов автора."""
+        recent = self.create_post('Свежий пост', hours_ago=1)
+        old = self.create_post('Старый пост', hours_ago=24 * 7)
+        scores = self.score(recent), self.score(old)
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertGreater(self.score(recent), scores[0])
+        self.assertEqual(self.score(old), scores[1])
+
+    def test_cursor_pages(self):
+        """Страницы идут по курсору без повторов и пропусков."""
+        for number in range(12):
+            self.create_post(f'Пост {number}', hours_ago=number)
+        response = Client().get(reverse('posts:hot_index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        response = Client().get(reverse('posts:hot_index'),
+                                {'cursor': page_obj.next_cursor})
+        self.assertEqual([post.text for post in response.context['page_obj']],
+                         ['Пост 10', 'Пост 11'])
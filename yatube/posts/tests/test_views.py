@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -9,7 +10,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Post, Group
+from .. import caching
+from ..models import Comment, Post, Group
 
 
 User = get_user_model()
@@ -222,7 +224,7 @@ class PostTests(TestCase):
 
         response = self.authorized_client.get(self.INDEX_URL)
         posts = response.content
-        post.delete()
+        Post.objects.filter(pk=post.pk).update(text='Изменено в обход')
 
         response_old = self.authorized_client.get(self.INDEX_URL)
         old_posts = response_old.content
@@ -234,3 +236,107 @@ class PostTests(TestCase):
         new_posts = response_new.content
 
         self.assertNotEqual(posts, new_posts)
+
+    def test_cache_invalidated_on_change(self):
+        """Создание, удаление поста и комментарий сразу видны
+        на страницах с кэшем фрагментов."""
+        self.authorized_client.get(self.INDEX_URL)
+        post = Post.objects.create(text='Новый пост для кэша',
+                                   author=self.author, group=self.group)
+        for url in self.names:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'Новый пост для кэша')
+
+        post.delete()
+        for url in self.names:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertNotContains(response, 'Новый пост для кэша')
+
+        self.authorized_client.get(self.POST_DETAIL_URL)
+        self.authorized_client.post(self.POST_COMMET,
+                                    data={'text': 'Свежий комментарий'})
+        response = self.authorized_client.get(self.POST_DETAIL_URL)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_cache_depends_on_page(self):
+        """Разные страницы ленты не отдают один и тот же фрагмент."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author)
+            for i in range(settings.QUANTITY_OF_POSTS)
+        )
+        first = self.authorized_client.get(self.INDEX_URL)
+        second = self.authorized_client.get(self.INDEX_URL + '?page=2')
+        self.assertContains(second, 'Тестовый пост')
+        self.assertNotContains(first, 'Тестовый пост')
+
+    def test_cache_depends_on_scope(self):
+        """Группы и посты с одинаковыми версиями не делят фрагменты."""
+        other_group = Group.objects.create(title='Другая группа',
+                                           slug='other-slug')
+        other_post = Post.objects.create(text='Пост другой группы',
+                                         author=self.author,
+                                         group=other_group)
+        cache.set_many({
+            caching._key(scope): 1 for scope in (
+                caching.FEED, caching.GROUPS,
+                caching.group_scope(self.group.id),
+                caching.group_scope(other_group.id),
+                caching.author_scope(self.author.id),
+                caching.post_scope(self.post.id),
+                caching.post_scope(other_post.id))}, timeout=None)
+        self.authorized_client.get(self.GROUP_LIST_URL)
+        response = self.authorized_client.get(reverse(
+            'posts:group_list', kwargs={'slug': 'other-slug'}))
+        self.assertContains(response, 'Пост другой группы')
+        self.assertNotContains(response, 'Тестовый пост')
+
+        self.authorized_client.get(self.POST_DETAIL_URL)
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': other_post.id}))
+        self.assertContains(response, 'Пост другой группы')
+        self.assertNotContains(response, 'Тестовый пост')
+
+    def test_cache_depends_on_read_source(self):
+        """Фрагмент, отрендеренный с отставшей реплики, не отдаётся
+        читателю с основной базы."""
+        cache.clear()
+        with mock.patch.object(caching, 'read_replica',
+                               return_value='replica1'):
+            self.authorized_client.get(self.INDEX_URL)
+        # Реплика не видела правку: версии уже новые, строки старые.
+        Post.objects.filter(pk=self.post.pk).update(text='Правка автора')
+        response = self.authorized_client.get(self.INDEX_URL)
+        self.assertContains(response, 'Правка автора')
+
+    def test_comments_paginated(self):
+        """Комментарии выводятся порциями, следующая порция доступна
+        отдельным фрагментом в HTML и JSON."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.auth_user,
+                    text=f'Комментарий {i}')
+            for i in range(settings.QUANTITY_OF_COMMENTS + 2)
+        )
+        response = self.guest_client.get(self.POST_DETAIL_URL)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.QUANTITY_OF_COMMENTS)
+        self.assertTrue(comments.has_next())
+
+        comments_url = reverse('posts:post_comments',
+                               kwargs={'post_id': self.post.pk})
+        response = self.guest_client.get(
+            comments_url, {'cursor': comments.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 2)
+        self.assertNotContains(response, 'js-more-comments')
+
+        data = self.guest_client.get(
+            comments_url, {'cursor': comments.next_cursor,
+                           'format': 'json'}).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Комментарий {i}' for i in range(
+                settings.QUANTITY_OF_COMMENTS,
+                settings.QUANTITY_OF_COMMENTS + 2)])
+        self.assertIsNone(data['next'])
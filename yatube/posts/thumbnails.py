@@ -0,0 +1,85 @@
+"""Фоновая подготовка превью картинок постов.
+
+После сохранения поста с новой картинкой превью строит задача очереди
+posts.generate_thumbnail (manage.py run_workers), а имя готового файла
+записывается в Post.thumbnail. Вместе с ним строятся варианты нескольких
+ширин в основном формате и в WebP для srcset (Post.image_variants).
+Шаблоны берут его оттуда, а пока превью не готово, показывают
+оригинал: в запросе превью не строится.
+Превью для постов, загруженных мимо очереди, строит команда
+``manage.py generate_thumbnails``.
+"""
+import json
+import logging
+
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+# Ширины вариантов для srcset; пропорции те же, что у GEOMETRY.
+VARIANT_WIDTHS = (480, 960, 1440)
+# Формат по умолчанию (THUMBNAIL_FORMAT) и WebP рядом с ним.
+VARIANT_FORMATS = {'fallback': None, 'webp': 'WEBP'}
+
+
+def _variant_geometry(width):
+    base_width, base_height = map(int, GEOMETRY.split('x'))
+    return f'{width}x{round(width * base_height / base_width)}'
+
+
+def build_variants(image):
+    """Строит варианты картинки всех ширин и форматов.
+
+    Возвращает {'fallback': [[ширина, имя файла], ...], 'webp': [...]}.
+    """
+    variants = {}
+    for name, image_format in VARIANT_FORMATS.items():
+        options = dict(OPTIONS)
+        if image_format:
+            options['format'] = image_format
+        variants[name] = [
+            [width, get_thumbnail(image, _variant_geometry(width),
+                                  **options).name]
+            for width in VARIANT_WIDTHS
+        ]
+    return variants
+
+
+def generate(post_id):
+    """Строит превью и его варианты и сохраняет их в посте.
+    Возвращает True, если превью построено, и False, если строить
+    нечего; ошибку построения пробрасывает."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id').first()
+    if post is None or not post.image:
+        return False
+    try:
+        thumbnail = get_thumbnail(post.image, GEOMETRY, **OPTIONS)
+        # Нечитаемый исходник sorl-thumbnail только логирует и отдаёт
+        # имя несуществующего файла.
+        if not thumbnail.exists():
+            raise OSError(f'Не удалось прочитать {post.image.name}')
+        variants = build_variants(post.image)
+    except Exception:
+        # Ошибку получает очередь задач: попытка повторится с задержкой.
+        logger.exception('Не удалось построить превью поста %s', post_id)
+        raise
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=thumbnail.name,
+        image_variants=json.dumps(variants),
+    )
+    if updated:
+        # update() не шлёт сигналов: фрагменты с постом перестраиваются
+        # здесь, иначе они показывали бы картинку без превью до
+        # следующего изменения.
+        scopes = [caching.FEED, caching.author_scope(post.author_id),
+                  caching.post_scope(post.id)]
+        if post.group_id is not None:
+            scopes.append(caching.group_scope(post.group_id))
+        caching.bump(*scopes)
+    return True
@@ -0,0 +1,129 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора, поэтому
+страница /follow/ читается одним диапазоном по индексу (user, pub_date).
+Посты авторов, у которых подписчиков больше TIMELINE_FANOUT_LIMIT, не
+раскладываются: такие ленты дочитываются из Post при запросе
+(fan-out-on-read). Когда автор опускается до порога, его последние
+посты раскладываются по лентам подписчиков (author_demoted).
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Follow, Post, Profile, TimelineEntry
+
+
+def is_celebrity(author_id):
+    followers = Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first()
+    return (followers or 0) > settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out_post(post):
+    """Раскладывает пост по лентам всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post.id,
+                       author_id=post.author_id, pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('id', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id,
+                       author_id=author_id, pub_date=pub_date)
+         for post_id, pub_date in posts[:settings.TIMELINE_BACKFILL_LIMIT]),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def author_demoted(author_id):
+    """Раскладывает последние посты автора, который больше не
+    «знаменитость», по лентам всех его подписчиков: из Post при запросе
+    их уже не дочитывают."""
+    if is_celebrity(author_id):
+        return
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('id', 'pub_date')[
+        :settings.TIMELINE_BACKFILL_LIMIT])
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id,
+                       author_id=author_id, pub_date=pub_date)
+         for user_id in followers.iterator()
+         for post_id, pub_date in posts),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 author_id=author_id).delete()
+
+
+def followed_celebrities(user):
+    """id авторов из подписок пользователя, чьи посты читаются
+    напрямую из Post."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__profile__followers_count__gt=(
+                settings.TIMELINE_FANOUT_LIMIT),
+        ).values_list('author_id', flat=True)
+    )
+
+
+def feed(user):
+    """Посты ленты подписок пользователя."""
+    posts = Post.objects.for_listing()
+    celebrities = followed_celebrities(user)
+    if not celebrities:
+        return posts.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__pub_date', '-timeline_entries__id')
+    entries = TimelineEntry.objects.filter(user=user).values('post_id')
+    return posts.filter(Q(id__in=entries) | Q(author_id__in=celebrities))
+
+
+def rebuild():
+    """Заполняет ленты заново одним INSERT ... SELECT по подпискам
+    и последним TIMELINE_BACKFILL_LIMIT постам каждого автора, как
+    backfill, — для данных, загруженных мимо сигналов (bulk_create).
+    Возвращает число записей."""
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {entry} (user_id, post_id, author_id, pub_date)'
+            ' SELECT follow.user_id, recent.id, recent.author_id,'
+            ' recent.pub_date'
+            ' FROM {follow} follow'
+            ' JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            '  PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            ' ) AS position FROM {post}) recent'
+            ' ON recent.author_id = follow.author_id'
+            ' AND recent.position <= %s'
+            ' JOIN {profile} profile ON profile.user_id = follow.author_id'
+            ' WHERE profile.followers_count <= %s'.format(
+                entry=TimelineEntry._meta.db_table,
+                follow=Follow._meta.db_table,
+                post=Post._meta.db_table,
+                profile=Profile._meta.db_table,
+            ),
+            [settings.TIMELINE_BACKFILL_LIMIT,
+             settings.TIMELINE_FANOUT_LIMIT])
+        return cursor.rowcount
@@ -0,0 +1,88 @@
+"""Формат выгрузки для команд export_posts и import_posts.
+
+Каталог выгрузки содержит posts.ndjson — по объекту JSON на строку,
+разделы в порядке SECTIONS, внутри раздела по возрастанию id, — и
+media/ с картинками постов под теми же именами, что в хранилище.
+Пользователи и группы в ссылках задаются username и slug, посты — id
+источника. Даты — ISO 8601 с часовым поясом.
+"""
+import json
+import os
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+DATA_FILE = 'posts.ndjson'
+MEDIA_DIR = 'media'
+CHECKPOINT_FILE = 'import.checkpoint'
+
+SECTIONS = ('user', 'group', 'follow', 'post', 'comment')
+MODELS = {
+    'user': User,
+    'group': Group,
+    'follow': Follow,
+    'post': Post,
+    'comment': Comment,
+}
+FIELDS = {
+    'user': ('id', 'username', 'first_name', 'last_name', 'date_joined'),
+    'group': ('id', 'slug', 'title', 'description'),
+    'follow': ('id', 'user', 'author'),
+    'post': ('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+}
+DATES = {'date_joined', 'pub_date', 'created'}
+# Ключ записи → поле для values_list() при выгрузке.
+LOOKUPS = {
+    'user': 'user__username',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'post': 'post_id',
+}
+
+
+def rows(section, after_id=0):
+    """Записи раздела с id больше after_id, по одной в памяти."""
+    fields = FIELDS[section]
+    dates = [position for position, name in enumerate(fields)
+             if name in DATES]
+    queryset = MODELS[section].objects.filter(id__gt=after_id).order_by(
+        'id').values_list(*(LOOKUPS.get(name, name) for name in fields))
+    for row in queryset.iterator(chunk_size=2000):
+        row = list(row)
+        for position in dates:
+            row[position] = row[position].isoformat()
+        yield {'model': section, **dict(zip(fields, row))}
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value)
+
+
+def last_record(path):
+    """Последняя целая запись файла и байт, на котором она кончается.
+
+    Недописанный хвост после неё — след прерванной выгрузки."""
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        end = file.tell()
+        position = end
+        tail = b''
+        while position > 0:
+            step = min(65536, position)
+            position -= step
+            file.seek(position)
+            tail = file.read(step) + tail
+            lines = tail.split(b'\n')
+            # Первая строка может быть обрезана чтением, последняя —
+            # недописанный хвост (или b'').
+            complete = [line for line in
+                        (lines[:-1] if position == 0 else lines[1:-1])
+                        if line.strip()]
+            if complete:
+                return json.loads(complete[-1]), end - len(lines[-1])
+        return None, 0
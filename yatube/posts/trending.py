@@ -0,0 +1,108 @@
+"""Лента «Популярное»: посты по счёту, который затухает со временем.
+
+Событие весом w в момент t — публикация (вес растёт с числом
+подписчиков автора), комментарий, новый подписчик автора — добавляет
+к «жару» поста w·2^(−(now − t)/HOT_HALF_LIFE). Множитель 2^(−now/…)
+общий для всех постов и порядок не меняет, поэтому в Post.hot_score
+хранится ln Σ w·2^((t − EPOCH)/HOT_HALF_LIFE): событие прибавляется
+одним UPDATE (log-sum-exp), с течением времени ничего пересчитывать
+не нужно, а индекс (-hot_score, -id) держит посты отсортированными —
+страница «Популярного» читается диапазоном индекса.
+
+Удалённый комментарий пересчитывает счёт поста заново (rescore);
+отписка счёт не уменьшает.
+"""
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .models import Comment, Post, Profile
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def event_score(weight, moment):
+    """Вклад одного события в логарифмической шкале."""
+    age = (moment - EPOCH).total_seconds() / settings.HOT_HALF_LIFE
+    return math.log(weight) + age * math.log(2)
+
+
+def publication_weight(followers):
+    return 1 + settings.HOT_FOLLOWER_WEIGHT * followers
+
+
+def combine(scores):
+    """ln Σ e^score без переполнения."""
+    top = max(scores)
+    return top + math.log(sum(math.exp(score - top) for score in scores))
+
+
+def _add(queryset, weight, moment=None):
+    value = Value(event_score(weight, moment or timezone.now()))
+    score = F('hot_score')
+    return queryset.update(hot_score=Greatest(score, value) + Ln(
+        1 + Exp(-Abs(score - value))))
+
+
+def post_published(post):
+    followers = Profile.objects.filter(user_id=post.author_id).values_list(
+        'followers_count', flat=True).first() or 0
+    Post.objects.filter(id=post.id).update(hot_score=event_score(
+        publication_weight(followers), post.pub_date))
+
+
+def comment_added(comment):
+    _add(Post.objects.filter(id=comment.post_id),
+         settings.HOT_COMMENT_WEIGHT, comment.created)
+
+
+def follower_added(author_id):
+    """Новый подписчик расширяет охват свежих постов автора."""
+    since = timezone.now() - timedelta(seconds=settings.HOT_FOLLOW_WINDOW)
+    _add(Post.objects.filter(author_id=author_id, pub_date__gte=since),
+         settings.HOT_FOLLOWER_WEIGHT)
+
+
+def rescore(queryset=None, batch_size=1000):
+    """Считает счёт заново по публикации и комментариям (охват — по
+    нынешнему числу подписчиков). Возвращает число постов."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    posts = queryset.order_by('id').values_list(
+        'id', 'pub_date', 'author__profile__followers_count')
+    comments = Comment.objects.filter(
+        post__in=queryset.values('id')).order_by('post_id').values_list(
+        'post_id', 'created').iterator()
+    comment = next(comments, None)
+    weight = settings.HOT_COMMENT_WEIGHT
+    sql = 'UPDATE {} SET hot_score = %s WHERE id = %s'.format(
+        connection.ops.quote_name(Post._meta.db_table))
+    total = 0
+    batch = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for post_id, pub_date, followers in posts.iterator():
+            scores = [event_score(publication_weight(followers or 0),
+                                  pub_date)]
+            while comment is not None and comment[0] <= post_id:
+                if comment[0] == post_id:
+                    scores.append(event_score(weight, comment[1]))
+                comment = next(comments, None)
+            batch.append((combine(scores), post_id))
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def hot_posts():
+    """Посты «Популярного» в порядке индекса post_hot_idx."""
+    return Post.objects.for_listing().order_by('-hot_score', '-id')
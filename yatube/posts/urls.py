@@ -7,12 +7,20 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
 
+    path('hot/', views.hot_index, name='hot_index'),
+
+    path('groups/', views.group_index, name='group_index'),
+
     path('group/<slug>/', views.group_list, name='group_list'),
 
     path('profile/<str:username>/', views.profile, name='profile'),
 
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
 
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
+
     path('create/', views.post_create, name='post_create'),
 
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -21,8 +29,14 @@ urlpatterns = [
          views.add_comment,
          name='add_comment'),
 
+    path('search/', views.post_search, name='post_search'),
+
     path('follow/', views.follow_index, name='follow_index'),
 
+    path('events/', views.index_events, name='index_events'),
+
+    path('follow/events/', views.follow_events, name='follow_events'),
+
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
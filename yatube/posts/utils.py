@@ -1,9 +1,163 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from types import SimpleNamespace
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
 
 
-def paginator(request, data_list):
-    paginator = Paginator(data_list, settings.QUANTITY_OF_POSTS)
+def paginator(request, data_list, allow_cursor=True, per_page=None):
+    if allow_cursor and (settings.PAGINATION_MODE == 'cursor'
+                         or 'cursor' in request.GET):
+        return cursor_paginator(request, data_list, per_page=per_page)
+    paginator = Paginator(data_list, per_page or settings.QUANTITY_OF_POSTS)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def cursor_paginator(request, data_list, ordering=('-pub_date', '-id'),
+                     per_page=None):
+    paginator = CursorPaginator(data_list,
+                                per_page or settings.QUANTITY_OF_POSTS,
+                                ordering)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def comments_paginator(request, comments):
+    return cursor_paginator(request, comments,
+                            ordering=('created', 'id'),
+                            per_page=settings.QUANTITY_OF_COMMENTS)
+
+
+class CursorPage(Sequence):
+    """Страница keyset-пагинации: без COUNT(*) и OFFSET."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<CursorPage of {} objects>'.format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу сортировки, например (pub_date, id).
+
+    Курсор — непрозрачная строка, в которой закодированы направление
+    и значения ключа крайней записи страницы, поэтому стоимость запроса
+    не зависит от глубины страницы.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _model_field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name in ('pk', 'id') else opts.get_field(name)
+
+    def _value_to_string(self, obj, name):
+        field = self._model_field(name)
+        if isinstance(obj, dict):
+            # Строка из .values(): ключ сортировки должен быть среди полей.
+            obj = SimpleNamespace(**{field.attname: obj[name]})
+        return field.value_to_string(obj)
+
+    def encode_cursor(self, obj, direction):
+        values = [self._value_to_string(obj, name) for name in self.fields]
+        raw = json.dumps([direction] + values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, значения ключа) или None."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, *values = json.loads(raw.decode())
+            if direction not in ('next', 'prev'):
+                return None
+            if len(values) != len(self.fields):
+                return None
+            values = [
+                self._model_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
+        return direction, values
+
+    def _keyset_filter(self, values, reverse):
+        """Условие «строго после» ключа для текущего направления обхода."""
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            field = self.fields[position]
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for prev_field, prev_value in zip(self.fields[:position],
+                                              values[:position]):
+                step &= Q(**{prev_field: prev_value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def get_page(self, cursor=None):
+        decoded = self.decode_cursor(cursor)
+        queryset = self.object_list
+        backwards = decoded is not None and decoded[0] == 'prev'
+        if decoded is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(decoded[1], reverse=backwards))
+        if backwards:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, self)
+
+        has_next = has_more if not backwards else True
+        has_previous = decoded is not None if not backwards else has_more
+        next_cursor = (self.encode_cursor(rows[-1], 'next')
+                       if has_next else None)
+        previous_cursor = (self.encode_cursor(rows[0], 'prev')
+                           if has_previous else None)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
@@ -1,55 +1,147 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 
+from . import caching, live, search, tasks, timeline, trending
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
-from .utils import paginator
+from .utils import comments_paginator, cursor_paginator, paginator
 
 
+@caching.anonymous_page
 def index(request):
-    posts = Post.objects.select_related('author', 'group')
+    page = caching.Page(request, 'index', caching.FEED)
+    response = page.not_modified()
+    if response is not None:
+        return response
+    posts = Post.objects.for_listing()
     page_obj = paginator(request, posts)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    return page.finish(render(
+        request, 'posts/index.html',
+        {'page_obj': page_obj, 'fragment_key': page.fragment_key}))
 
 
+@caching.anonymous_page
+def hot_index(request):
+    page = caching.Page(request, 'hot_index', caching.FEED, caching.HOT)
+    response = page.not_modified()
+    if response is not None:
+        return response
+    # Курсор по (hot_score, id) — диапазон индекса без OFFSET и COUNT(*).
+    page_obj = cursor_paginator(request, trending.hot_posts(),
+                                ordering=('-hot_score', '-id'))
+    return page.finish(render(
+        request, 'posts/hot.html',
+        {'page_obj': page_obj, 'fragment_key': page.fragment_key}))
+
+
+@caching.anonymous_page
+def group_index(request):
+    page = caching.Page(request, 'group_index', caching.GROUPS)
+    response = page.not_modified()
+    if response is not None:
+        return response
+    # Сводка хранится в самих группах (posts.counters): COUNT(*) по
+    # страницам и одна выборка вместе с последними постами.
+    groups = Group.objects.select_related('last_post__author').order_by(
+        'title', 'id')
+    page_obj = paginator(request, groups, allow_cursor=False,
+                         per_page=settings.QUANTITY_OF_GROUPS)
+    return page.finish(render(
+        request, 'posts/group_index.html',
+        {'page_obj': page_obj, 'fragment_key': page.fragment_key}))
+
+
+@caching.anonymous_page
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    page = caching.Page(request, 'group_list',
+                        caching.group_scope(group.id))
+    response = page.not_modified()
+    if response is not None:
+        return response
+    posts = group.posts.for_listing()
     page_obj = paginator(request, posts)
-    return render(request,
-                  'posts/group_list.html',
-                  {'group': group,
-                   'page_obj': page_obj})
+    return page.finish(render(
+        request,
+        'posts/group_list.html',
+        {'group': group,
+         'page_obj': page_obj,
+         'fragment_key': page.fragment_key}))
 
 
+@caching.anonymous_page
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_list = author.posts.all()
+    author = get_object_or_404(User.objects.select_related('profile'),
+                               username=username)
+    # Кнопка подписки меняется вместе с лентой подписок читателя.
+    page = caching.Page(
+        request, 'profile', caching.author_scope(author.id),
+        extra=([caching.timeline_scope(request.user.id)]
+               if request.user.is_authenticated else []))
+    response = page.not_modified()
+    if response is not None:
+        return response
+    posts_list = author.posts.for_listing()
     page_obj = paginator(request, posts_list)
     following = False
     if request.user.is_authenticated:
         follow_list = Follow.objects.filter(user=request.user, author=author)
         following = follow_list.exists()
-    return render(request,
-                  'posts/profile.html',
-                  {'page_obj': page_obj,
-                   'author': author,
-                   'following': following})
+    return page.finish(render(
+        request,
+        'posts/profile.html',
+        {'page_obj': page_obj,
+         'author': author,
+         'following': following,
+         'fragment_key': page.fragment_key}))
 
 
+@caching.anonymous_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), id=post_id)
+    # В боковой колонке число постов автора.
+    page = caching.Page(request, 'post_detail', caching.post_scope(post.id),
+                        extra=[caching.author_scope(post.author_id)])
+    response = page.not_modified()
+    if response is not None:
+        return response
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = comments_paginator(request, post.comments.for_listing())
+    return page.finish(render(
+        request,
+        'posts/post_detail.html',
+        {'post': post,
+         'requser': request.user,
+         'comments': comments,
+         'form': form,
+         'fragment_key': page.fragment_key}))
+
+
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    comments = comments_paginator(request, post.comments.for_listing())
+    if (request.GET.get('format') == 'json'
+            or 'application/json' in request.META.get('HTTP_ACCEPT', '')):
+        return JsonResponse({
+            'comments': [
+                {'id': comment.id,
+                 'author': comment.author.username,
+                 'text': comment.text,
+                 'created': comment.created.isoformat()}
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
     return render(request,
-                  'posts/post_detail.html',
-                  {'post': post,
-                   'requser': request.user,
-                   'comments': comments,
-                   'form': form})
+                  'posts/includes/comments.html',
+                  {'post': post, 'comments': comments})
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     if request.method == 'POST':
         form = PostForm(request.POST or None,
@@ -58,6 +150,8 @@ def post_create(request):
             create_post = form.save(commit=False)
             create_post.author_id = request.user.id
             create_post.save()
+            if create_post.image:
+                tasks.generate_thumbnail.enqueue(create_post.id)
             return redirect('posts:profile', request.user)
         return render(request, 'posts/post_create.html', {'form': form})
     else:
@@ -66,6 +160,7 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user.id != post.author_id:
@@ -74,7 +169,13 @@ def post_edit(request, post_id):
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            post.thumbnail = ''
+            post.image_variants = ''
         form.save()
+        if image_changed and post.image:
+            tasks.generate_thumbnail.enqueue(post.id)
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/post_create.html', {'form': form,
                                                       'post': post,
@@ -82,6 +183,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -93,14 +195,52 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search.search(query, Post.objects.for_listing())
+    # Порядок по релевантности не подходит для курсора по дате.
+    page_obj = paginator(request, posts, allow_cursor=False)
+    return render(request, 'posts/search.html',
+                  {'page_obj': page_obj, 'query': query})
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = timeline.feed(request.user)
     page_obj = paginator(request, posts)
-    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+    return render(request, 'posts/follow.html',
+                  {'page_obj': page_obj,
+                   'fragment_key': caching.fragment_key(
+                       request, f'follow:{request.user.id}', caching.FEED,
+                       caching.timeline_scope(request.user.id))})
+
+
+def _event_stream(events):
+    response = StreamingHttpResponse(events,
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен копить события в буфере.
+    response['X-Accel-Buffering'] = 'no'
+    # core.asgi отдаёт такое тело из цикла событий, не занимая поток.
+    response.async_streaming_content = events
+    return response
+
+
+def index_events(request):
+    """Уведомления для главной: все новые посты."""
+    return _event_stream(live.EventStream(request))
+
+
+@login_required
+def follow_events(request):
+    """Уведомления для ленты подписок: посты авторов читателя."""
+    authors = set(Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True))
+    return _event_stream(live.EventStream(request, authors))
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user.id != author.id:
@@ -114,6 +254,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user,
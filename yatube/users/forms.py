@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .tasks import send_password_reset
+
 
 User = get_user_model()
 
@@ -13,3 +15,21 @@ class CreationForm(UserCreationForm):
         model = User
         # укажем, какие поля должны быть видны в форме и в каком порядке
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой сброса пароля отправляет очередь задач,
+    а страница отвечает сразу."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        # Ссылка с токеном не должна лежать в очереди открытым текстом.
+        send_password_reset.enqueue(
+            context['user'].pk, to_email, from_email,
+            subject_template_name, email_template_name,
+            html_email_template_name,
+            domain=context['domain'],
+            site_name=context['site_name'],
+            protocol=context['protocol'],
+        )
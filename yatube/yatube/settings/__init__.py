@@ -0,0 +1,15 @@
+"""Профиль настроек выбирается переменной окружения YATUBE_ENV:
+development (по умолчанию) или production."""
+import os
+
+YATUBE_ENV = os.getenv('YATUBE_ENV', 'development')
+
+if YATUBE_ENV == 'production':
+    from .production import *  # noqa: F401,F403
+elif YATUBE_ENV == 'development':
+    from .development import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV={YATUBE_ENV!r}: ожидается development или production.')
@@ -0,0 +1,367 @@
+"""
+Django settings for yatube project.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+Общие настройки; профили development и production дополняют их.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = '=8al=e5bvgrybe9v6jvb4jx5apd=#qxb74rg28=o_t*jrv2dvu'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+# ASGI-вход (core.asgi): обработчик Django выполняется в пуле из
+# ASGI_THREADS потоков. SSE отдаётся из цикла событий, прочие потоковые
+# ответы читаются в пуле ASGI_STREAM_THREADS.
+ASGI_APPLICATION = 'yatube.asgi.application'
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+ASGI_STREAM_THREADS = int(os.getenv('ASGI_STREAM_THREADS', 4))
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+# core.db_backends.sqlite3 включает WAL и настраивает pragma на каждом
+# соединении; пишущие транзакции начинаются с BEGIN IMMEDIATE и ждут
+# блокировку до timeout секунд.
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3'))
+
+
+def env_list(name):
+    return [item.strip() for item in os.getenv(name, '').split(',')
+            if item.strip()]
+
+
+if os.getenv('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        }
+    }
+    REPLICAS = [{**DATABASES['default'], 'HOST': host}
+                for host in env_list('POSTGRES_REPLICA_HOSTS')]
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+    # Отдельные соединения только для чтения к тому же файлу.
+    if os.getenv('SQLITE_READ_CONNECTIONS', '').lower() in (
+            '1', 'true', 'yes'):
+        DATABASES['readonly'] = {
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'OPTIONS': {'timeout': 20, 'read_only': True},
+            'TEST': {'MIRROR': 'default'},
+        }
+    # Для проверки на одной машине реплика — копия файла базы.
+    REPLICAS = [{
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {'timeout': 20, 'read_only': True},
+    } for path in env_list('SQLITE_REPLICAS')]
+
+# Реплики: только чтение и только для представлений из REPLICA_VIEWS,
+# см. core.middleware.ReplicaRoutingMiddleware.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(REPLICAS, 1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {**replica,
+                                     'TEST': {'MIRROR': 'default'}}
+del REPLICAS
+
+DATABASE_ROUTERS = ['core.db_routers.ReadWriteRouter']
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+
+# Моя константа
+QUANTITY_OF_POSTS = 10
+# 'page' — классическая пагинация с номерами страниц,
+# 'cursor' — keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET.
+PAGINATION_MODE = os.getenv('PAGINATION_MODE', 'page')
+QUANTITY_OF_COMMENTS = 20
+QUANTITY_OF_GROUPS = 50
+SLICE_LENGTH = 15
+# Лента подписок: авторы с большим числом подписчиков не раскладываются
+# по лентам при публикации, а дочитываются при запросе.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL_LIMIT = 1000
+# «Популярное» (posts.trending): вклад события в счёт поста вдвое
+# меньше каждые HOT_HALF_LIFE секунд. Вес публикации — 1 плюс
+# HOT_FOLLOWER_WEIGHT за каждого подписчика автора; новый подписчик
+# добавляет столько же постам автора за последние HOT_FOLLOW_WINDOW секунд.
+HOT_HALF_LIFE = 12 * 60 * 60
+HOT_COMMENT_WEIGHT = 1
+HOT_FOLLOWER_WEIGHT = 0.1
+HOT_FOLLOW_WINDOW = 2 * 24 * 60 * 60
+# Уведомления о новых постах (posts.live): как часто каждый процесс
+# проверяет новые посты и через сколько секунд простоя поток событий
+# шлёт пустой комментарий. 0 в LIVE_POLL_INTERVAL отключает фоновый опрос.
+LIVE_POLL_INTERVAL = 1
+LIVE_HEARTBEAT = 15
+
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+
+# Для ошибки 403:
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Кэш: 'locmem' — свой в каждом процессе, 'sqlite' и 'file' — общий
+# для всех воркеров на одной машине, без внешних сервисов.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 100000))
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+# Сессии и хранилище ключей sorl-thumbnail читают из того же кэша,
+# а база остаётся источником истины.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE = 'default'
+# Сколько секунд браузеры и общие кэши могут не перепроверять
+# анонимные страницы лент и постов (ETag проверяется и после).
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 30))
+# Сколько секунд хранятся страницы целиком для анонимных посетителей;
+# изменения постов инвалидируют их сразу, через версии областей.
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 300))
+
+# Фоновая очередь (core.tasks): письма, превью и раскладка по лентам
+# выполняет manage.py run_workers. С TASKS_EAGER задачи выполняются
+# сразу при постановке, без воркеров.
+TASKS_EAGER = os.getenv('TASKS_EAGER', '').lower() in ('1', 'true', 'yes')
+# Попыток на задачу; между ними — удвоение задержки, секунды.
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 3600
+# Задача, которая выполняется дольше, считается брошенной умершим
+# воркером и возвращается в очередь.
+TASK_LOCK_TIMEOUT = int(os.getenv('TASK_LOCK_TIMEOUT', 600))
+# Сколько секунд хранить выполненные задачи (для сводки /metrics/tasks/).
+TASK_KEEP_DONE = int(os.getenv('TASK_KEEP_DONE', 86400))
+# Как часто простаивающий воркер проверяет очередь, секунды.
+TASK_POLL_INTERVAL = float(os.getenv('TASK_POLL_INTERVAL', 1))
+
+# Метрики запросов (core.middleware.RequestMetricsMiddleware): больше
+# запросов к базе, чем в бюджете представления, — признак N+1.
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', 10))
+REQUEST_QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 4,
+    'posts:follow_index': 5,
+    'posts:hot_index': 3,
+    'posts:group_index': 4,
+    # Запись: счётчики, лента подписок, поиск, популярность и задачи
+    # очереди. Замеры с TASKS_EAGER = False и картинкой в посте; с
+    # TASKS_EAGER = True запросы самих задач в бюджет не входят.
+    'posts:post_create': 15,
+    'posts:post_edit': 11,
+    'posts:add_comment': 8,
+    'posts:profile_follow': 14,
+    'posts:profile_unfollow': 10,
+    'api:posts': 17,
+    'api:post_detail': 13,
+    'api:post_comments': 10,
+    'api:profile_follow': 14,
+}
+# Сколько последних замеров каждого представления хранить для перцентилей.
+REQUEST_METRICS_SAMPLES = 1000
+
+# Представления, которые читают с реплик (если DATABASE_REPLICAS задан).
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'posts:hot_index',
+    'posts:group_index',
+]
+# После запроса, который писал в базу, браузер столько секунд читает
+# с основной базы: автор сразу видит свой пост, даже если реплика отстала.
+REPLICA_PIN_COOKIE = 'read_primary'
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        # INFO — строка на каждый запрос, WARNING — только сверх бюджета.
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        # INFO — строка на каждую выполненную задачу очереди,
+        # WARNING — повторы, ERROR — исчерпанные попытки.
+        'yatube.tasks': {
+            'handlers': ['console'],
+            'level': os.getenv('TASK_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        # Сводка активных настроек при запуске процесса (core.checks).
+        'yatube.settings': {
+            'handlers': ['console'],
+            'level': os.getenv('SETTINGS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,17 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+# Без запущенного run_workers задачи очереди выполняются сразу.
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'true').lower() in ('1', 'true', 'yes')
+
+# debug_toolbar только для разработки.
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
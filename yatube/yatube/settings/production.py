@@ -0,0 +1,64 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, LOGGING, TEMPLATES
+
+
+def env_flag(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+DEBUG = env_flag('DJANGO_DEBUG', False)
+
+SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте DJANGO_SECRET_KEY.')
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.getenv('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+    if host.strip()
+]
+
+# Шаблоны компилируются один раз на процесс.
+if env_flag('TEMPLATE_CACHE', True):
+    TEMPLATES = [{
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [(
+                'django.template.loaders.cached.Loader',
+                ['django.template.loaders.filesystem.Loader',
+                 'django.template.loaders.app_directories.Loader'],
+            )],
+        },
+    }]
+
+# Постоянные соединения с базой, секунды; 0 — новое на каждый запрос.
+DATABASES = {
+    alias: {**database,
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 600))}
+    for alias, database in DATABASES.items()
+}
+
+# Имена статики с хэшем содержимого: можно кэшировать навсегда.
+# Перед запуском нужен manage.py collectstatic.
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'static_root'))
+if env_flag('STATIC_MANIFEST', True):
+    STATICFILES_STORAGE = (
+        'django.contrib.staticfiles.storage.ManifestStaticFilesStorage')
+
+# При запуске каждого процесса в лог пишется, что включено.
+LOGGING = {
+    **LOGGING,
+    'loggers': {
+        **LOGGING['loggers'],
+        'yatube.settings': {
+            **LOGGING['loggers']['yatube.settings'],
+            'level': os.getenv('SETTINGS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}